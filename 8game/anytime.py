@@ -0,0 +1,132 @@
+import math
+import time
+from bucket_queue import BucketQueue
+from board import SIZE, successor_function, reconstruct_path
+from greedy import make_heuristic
+
+""" Anytime Weighted A*
+For callers that need a bounded response time more than an optimal path. The search runs weighted A* phases, ranking states by g + w * h, with decreasing weights: a heavily weighted phase finds a solution quickly, and every following phase restarts from the initial state looking for a cheaper one, pruning the states whose f = g + h shows they can't lead to it. A solution found with weight w costs at most w times the optimum, and with w = 1 the search is plain A*.
+The search stops when the weights are exhausted, when a phase proves the best solution optimal, or when a budget runs out (wall clock seconds, or expanded states over all phases), and returns the best path found so far with its suboptimality bound: a proven upper bound of its cost divided by the optimal cost.
+The bound comes from a lower bound of the optimal cost, raised by every phase: the heuristic of the initial state, the cost of a solution divided by its weight, and the lowest f = g + h among the states left in the frontier, since with an admissible heuristic one of them lies on an optimal path with its optimal g (or the best solution is already optimal)
+"""
+WEIGHTS = (5, 3, 2, 1.5, 1.25, 1)
+
+""" Weight Scale
+Priorities are integers (see bucket_queue.py), so they are computed as WEIGHT_SCALE * g + round(WEIGHT_SCALE * w) * h: weights are rounded to quarters
+"""
+WEIGHT_SCALE = 4
+
+""" Time Check Interval
+The clock is read every this many expansions, which keeps the overshoot of the time budget to a fraction of a millisecond
+"""
+TIME_CHECK_INTERVAL = 256
+
+""" Suboptimality Bound
+Upper bound of cost / optimal cost, given a lower bound of the optimal cost
+"""
+def suboptimality_bound(cost, lower_bound):
+    if cost <= lower_bound:
+        return 1.0
+    return cost / lower_bound if lower_bound > 0 else math.inf
+
+""" Anytime Search
+Parameters like a_star_search, plus:
+- weights - decreasing weights of the phases; a phase whose weight rounds below 1 runs with weight 1
+- time_budget - seconds after which the search stops (None for no limit)
+- max_nodes - number of expanded states after which the search stops (None for no limit)
+Returns (path, bound): the best path found (None if there is none, or if no solution was found within the budget) and its suboptimality bound (None without a path).
+With 'stats', states expanded again in later phases are counted again (see stats.py), and stats.suboptimality receives the bound
+"""
+def anytime_search(initial_state, final_state, heuristic, size=SIZE, weights=WEIGHTS, time_budget=None, max_nodes=None, stats=None):
+    evaluate, update = make_heuristic(heuristic, final_state, size)
+    successors = successor_function(size)
+    if stats is not None:
+        successors = stats.timed(successors, "expansion_seconds")
+        update = stats.timed(update, "heuristic_seconds")
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    initial_heuristic = evaluate(initial_state)
+    best_path = None
+    incumbent = math.inf
+    lower_bound = initial_heuristic
+    expanded = 0
+    stopped = False
+    deepest = 0
+
+    for weight in weights:
+        scaled_weight = max(WEIGHT_SCALE, round(weight * WEIGHT_SCALE))
+        """ Phase Initialization
+        - frontier - states by g + w * h, as (g, h, state) entries
+        - cost / prev - lowest number of moves found so far to each state in this phase, and the state it was reached from
+        - f_counts - f_counts[f] is the number of frontier entries with g + h = f, so the lowest f of the frontier is found without scanning it. Outdated entries are counted too, which can only lower it: it stays a valid lower bound
+        """
+        frontier = BucketQueue("lifo")
+        frontier.push(scaled_weight * initial_heuristic, (0, initial_heuristic, initial_state))
+        f_counts = [0] * (initial_heuristic + 1)
+        f_counts[initial_heuristic] = 1
+        cost = {initial_state: 0}
+        prev = {initial_state: None}
+        found = None
+
+        """ Phase Loop
+        States that can't lead to a solution cheaper than the incumbent are pruned, both when generated and when popped
+        """
+        while frontier:
+            if max_nodes is not None and expanded >= max_nodes:
+                stopped = True
+                break
+            if deadline is not None and expanded % TIME_CHECK_INTERVAL == 0 and time.perf_counter() >= deadline:
+                stopped = True
+                break
+            priority, (g, h, state) = frontier.pop()
+            f_counts[g + h] -= 1
+            if g > cost[state] or g + h >= incumbent:
+                continue
+            if state == final_state:
+                found = g
+                break
+            children = successors(state)
+            expanded += 1
+            if stats is not None:
+                stats.expand(state, len(frontier) + 1, len(children))
+                if g > deepest:
+                    deepest = g
+            for move, neighbor in children:
+                neighbor_cost = g + 1
+                if neighbor_cost < cost.get(neighbor, neighbor_cost + 1):
+                    neighbor_heuristic = update(h, state, neighbor)
+                    if neighbor_cost + neighbor_heuristic >= incumbent:
+                        continue
+                    cost[neighbor] = neighbor_cost
+                    prev[neighbor] = state
+                    frontier.push(WEIGHT_SCALE * neighbor_cost + scaled_weight * neighbor_heuristic, (neighbor_cost, neighbor_heuristic, neighbor))
+                    f = neighbor_cost + neighbor_heuristic
+                    while len(f_counts) <= f:
+                        f_counts.append(0)
+                    f_counts[f] += 1
+
+        """ Phase Result
+        A phase that empties its frontier proves that no cheaper solution exists. Otherwise, the lowest f left in the frontier (the goal's own f when a solution was just found) bounds the optimal cost from below
+        """
+        if found is not None:
+            best_path = reconstruct_path(final_state, prev)
+            incumbent = found
+            lower_bound = max(lower_bound, math.ceil(found * WEIGHT_SCALE / scaled_weight))
+        if not frontier and found is None and not stopped:
+            lower_bound = incumbent
+            break
+        lowest = next((f for f, count in enumerate(f_counts) if count), incumbent)
+        lower_bound = max(lower_bound, min(lowest, incumbent))
+        if stopped or lower_bound >= incumbent:
+            break
+
+    bound = None if best_path is None else suboptimality_bound(incumbent, lower_bound)
+    if stats is not None:
+        stats.suboptimality = bound
+        stats.finish(best_path, max_depth=deepest)
+    return best_path, bound
+
+""" Anytime A* Search
+Solver entry point (see solver.py), with the parameters of the other informed solvers and the budgets of anytime_search; returns only the path
+"""
+def anytime_a_star_search(initial_state, final_state, heuristic, size=SIZE, time_budget=None, max_nodes=None, stats=None):
+    return anytime_search(initial_state, final_state, heuristic, size, time_budget=time_budget, max_nodes=max_nodes, stats=stats)[0]
@@ -0,0 +1,120 @@
+""" Bucket Queue
+Used as the priority queue of A*, ordered by f = g + h (see bucket_queue.py)
+"""
+from bucket_queue import BucketQueue
+from board import SIZE, successor_function, reconstruct_path, NO_MOVE
+from greedy import make_heuristic
+
+""" A* Algorithm
+Implementation of the A* Algorithm function, having as parameters the initial_state, final_state and heuristic, like greedy_best_first_search.
+States are ranked by f = g + h, where g is the number of moves from the initial state and h the heuristic value, so with the admissible heuristics of greedy.py the returned path is optimal
+'order' is the tie-breaking order among states with the same f: 'lifo' (default, which favors the deeper, most recently generated states) or 'fifo'
+A SearchStats object passed as 'stats' is filled in with the search statistics (see stats.py)
+"""
+def a_star_search(initial_state, final_state, heuristic, size=SIZE, order="lifo", stats=None):
+    evaluate, update = make_heuristic(heuristic, final_state, size)
+    """ Variables/Data Structures Initialization
+    - frontier - priority queue of (g, state) entries by f. h = f - g is reused to update the heuristic of the children
+    - cost - is a dictionary mapping each state to the lowest number of moves found so far to reach it
+    - prev - is a dictionary mapping each state to the state that led to it, helping to reconstruct the path once the final state is found
+    - successors - the shared successor generator for this board size (see board.py)
+    """
+    frontier = BucketQueue(order)
+    frontier.push(evaluate(initial_state), (0, initial_state))
+    cost = {initial_state: 0}
+    prev = {initial_state: None}
+    successors = successor_function(size)
+    if stats is not None:
+        successors = stats.timed(successors, "expansion_seconds")
+        update = stats.timed(update, "heuristic_seconds")
+        cost = stats.timed_dict(cost)
+        prev = stats.timed_dict(prev)
+
+    """ A* Loop
+    The loop will continue as long as there are states in the 'frontier' to be explored
+    """
+    while frontier:
+        f, (g, board) = frontier.pop()
+        """ Final State Check
+        With an admissible heuristic, the first time the goal is popped its path is optimal
+        """
+        if board == final_state:
+            path = reconstruct_path(board, prev)
+            return path if stats is None else stats.finish(path, len(cost), max(cost.values()))
+        """ Outdated Entry
+        A state may have been pushed again with a lower cost after this entry was created. The outdated entry is skipped
+        """
+        if g > cost[board]:
+            continue
+
+        """ Neighbor Exploration
+        A neighbor is (re)queued whenever this is the cheapest way found so far to reach it
+        """
+        children = successors(board)
+        if stats is not None:
+            stats.expand(board, len(frontier) + 1, len(children))
+        for move, neighbor in children:
+            neighbor_cost = g + 1
+            if neighbor_cost < cost.get(neighbor, neighbor_cost + 1):
+                cost[neighbor] = neighbor_cost
+                prev[neighbor] = board
+                frontier.push(neighbor_cost + update(f - g, board, neighbor), (neighbor_cost, neighbor))
+
+    return None if stats is None else stats.finish(None, len(cost), max(cost.values()))
+
+""" IDA* Algorithm
+Implementation of the Iterative Deepening A* Algorithm function, with the same parameters as a_star_search.
+It runs repeated depth-first searches bounded by f = g + h, raising the bound to the smallest f that exceeded it each time. Only the current path (and a set of the states on it) is kept in memory, so memory use is linear in the solution depth, and the returned path is optimal
+With 'stats', states expanded again in later iterations are counted again, and the frontier size is the length of the current path
+"""
+def ida_star_search(initial_state, final_state, heuristic, size=SIZE, stats=None):
+    evaluate, update = make_heuristic(heuristic, final_state, size)
+    successors = successor_function(size)
+    path = [initial_state]
+    on_path = {initial_state}
+    if stats is not None:
+        successors = stats.timed(successors, "expansion_seconds")
+        update = stats.timed(update, "heuristic_seconds")
+    initial_heuristic = evaluate(initial_state)
+    bound = initial_heuristic
+
+    """ Bounded Search
+    Depth-first search from 'state', reached with g moves by 'last_move' and with heuristic value h. It returns True when the goal was found (and 'path' holds the solution), otherwise the smallest f value that exceeded the bound
+    The move that would undo 'last_move' is never generated, and states already on the current path are skipped
+    """
+    def search(state, g, h, last_move):
+        f = g + h
+        if f > bound:
+            return f
+        if state == final_state:
+            return True
+        minimum = None
+        children = successors(state, last_move)
+        if stats is not None:
+            stats.expand(state, len(path), len(children))
+            if g > stats.max_depth:
+                stats.max_depth = g
+        for move, neighbor in children:
+            if neighbor in on_path:
+                continue
+            path.append(neighbor)
+            on_path.add(neighbor)
+            result = search(neighbor, g + 1, update(h, state, neighbor), move)
+            if result is True:
+                return True
+            if result is not None and (minimum is None or result < minimum):
+                minimum = result
+            path.pop()
+            on_path.discard(neighbor)
+        return minimum
+
+    """ Iterative Deepening Loop
+    The loop ends when the goal is found, or when no state exceeded the bound, which means the final state can't be reached
+    """
+    while True:
+        result = search(initial_state, 0, initial_heuristic, NO_MOVE)
+        if result is True:
+            return path if stats is None else stats.finish(path)
+        if result is None:
+            return None if stats is None else stats.finish(None)
+        bound = result
@@ -0,0 +1,194 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import board
+import cache
+import greedy
+import solver
+
+""" Batch Solving
+Non-interactive alternative to index.py. Jobs are read from a file (or stdin), one per line:
+    <start tiles> <goal tiles> <algorithm> [heuristic]
+where tiles are comma separated in row order, like in index.insert_manual_matrix, e.g.
+    1,2,3,4,0,5,7,8,6 1,2,3,4,5,6,7,8,0 astar manhattan
+Empty lines and lines starting with '#' are ignored. Jobs are sent in chunks to a pool of worker processes and one JSON result per job is written as soon as its chunk finishes, so results come out in completion order (use the "job" field, the job's line number, to match them with the input).
+Invalid and unsolvable jobs are answered directly, without reaching a worker. With a result cache (see cache.py), jobs equivalent to one already solved are answered from it too, with "cached": true
+"""
+
+""" Parse Tiles
+Converts comma separated tiles into a packed board, checking that they are a permutation of 0..n*n-1
+"""
+def parse_tiles(text):
+    tiles = [int(tile) for tile in text.split(",")]
+    size = math.isqrt(len(tiles))
+    if size < 2 or size * size != len(tiles) or sorted(tiles) != list(range(len(tiles))):
+        raise ValueError(f"Invalid board: {text}")
+    return board.from_tiles(tiles, size), size
+
+""" Parse Job
+Converts one line of the jobs file into a job dictionary. Raises ValueError for malformed lines
+"""
+def parse_job(number, line):
+    fields = line.split()
+    if len(fields) not in (3, 4):
+        raise ValueError("Expected: <start tiles> <goal tiles> <algorithm> [heuristic]")
+    initial_state, size = parse_tiles(fields[0])
+    final_state, final_size = parse_tiles(fields[1])
+    if size != final_size:
+        raise ValueError("Start and goal boards have different sizes")
+    if fields[2] not in solver.ALGORITHMS:
+        raise ValueError(f"Unknown algorithm: {fields[2]}")
+    if len(fields) == 4 and fields[3] not in greedy.HEURISTICS:
+        raise ValueError(f"Unknown heuristic: {fields[3]}")
+    return {
+        "job": number,
+        "start": fields[0],
+        "goal": fields[1],
+        "algorithm": fields[2],
+        "heuristic": fields[3] if len(fields) == 4 else None,
+        "size": size,
+        "initial_state": initial_state,
+        "final_state": final_state,
+    }
+
+""" Solve Job
+Runs one job and returns its result dictionary. The solution is reported as a move string (see board.move_string); any error raised by the solver is reported with the "error" status, so one failing job doesn't end the batch
+"""
+def solve_job(job):
+    result = {key: job[key] for key in ("job", "start", "goal", "algorithm", "heuristic")}
+    start_time = time.perf_counter()
+    try:
+        path = solver.solve(job["initial_state"], job["final_state"], job["algorithm"], job["heuristic"], job["size"])
+    except Exception as e:
+        result.update(status="error", error=str(e) or type(e).__name__)
+        return result
+    result["seconds"] = round(time.perf_counter() - start_time, 6)
+    if path is None:
+        result["status"] = "no solution"
+    else:
+        result.update(status="solved", moves=len(path) - 1, solution=board.move_string(path, job["size"]))
+    return result
+
+""" Solve Chunk
+Worker entry point: solves a list of jobs and returns their results
+"""
+def solve_chunk(jobs):
+    return [solve_job(job) for job in jobs]
+
+""" Read Jobs
+Generator over the lines of the jobs file, yielding either a job dictionary or, for invalid and unsolvable jobs, their final result
+"""
+def read_jobs(lines):
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            job = parse_job(number, line)
+        except ValueError as e:
+            yield {"job": number, "status": "invalid", "error": str(e)}
+            continue
+        if not board.is_solvable(job["initial_state"], job["final_state"], job["size"]):
+            yield {key: job[key] for key in ("job", "start", "goal", "algorithm", "heuristic")} | {"status": "unsolvable"}
+            continue
+        yield job
+
+""" Run Batch
+Solves every job read from 'lines' on a pool of 'workers' processes, 'chunk_size' jobs per task, and yields the results in completion order.
+At most two chunks per worker are in flight at a time, so the jobs file is read as the pool makes progress instead of all at once.
+'result_cache', a cache.SolverCache, is looked up in this process before a job is sent to the pool, and filled with the results that come back
+"""
+def run_batch(lines, workers=None, chunk_size=16, result_cache=None):
+    workers = workers or os.cpu_count() or 1
+    keys = {}
+
+    """ Finish
+    Stores the results of a chunk in the cache and marks them as not cached. Errors are not cached
+    """
+    def finish(results):
+        for result in results:
+            key = keys.pop(result["job"], None)
+            if key is not None and result["status"] in ("solved", "no solution"):
+                result_cache.store(key, result.get("solution"))
+                result["cached"] = False
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        max_pending = 2 * workers
+        pending = set()
+        chunk = []
+        for job in read_jobs(lines):
+            if "initial_state" not in job:
+                yield job
+                continue
+            if result_cache is not None:
+                key = result_cache.key(job["initial_state"], job["final_state"], job["algorithm"], job["heuristic"], job["size"])
+                found, moves = result_cache.lookup(key)
+                if found:
+                    yield cached_result(job, moves)
+                    continue
+                keys[job["job"]] = key
+            chunk.append(job)
+            if len(chunk) == chunk_size:
+                pending.add(executor.submit(solve_chunk, chunk))
+                chunk = []
+                """ Back Pressure
+                Once enough chunks are queued, wait for some to finish and stream their results before reading more jobs
+                """
+                while len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from finish(future.result())
+        if chunk:
+            pending.add(executor.submit(solve_chunk, chunk))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from finish(future.result())
+
+""" Cached Result
+Result of a job answered from the result cache: the cached move string (None for queries without solution) is valid for the job's own start, since cached queries are only relabeled
+"""
+def cached_result(job, moves):
+    result = {key: job[key] for key in ("job", "start", "goal", "algorithm", "heuristic")} | {"seconds": 0.0, "cached": True}
+    if moves is None:
+        result["status"] = "no solution"
+    else:
+        result.update(status="solved", moves=len(moves), solution=moves)
+    return result
+
+""" Command Line
+python batch.py [jobs_file] [--workers N] [--chunk-size N] [--output results_file] [--cache-mb N] [--cache-file FILE]
+Without a jobs file, jobs are read from stdin; without an output file, results are written to stdout. The result cache is loaded from and saved to the cache file when one is given; --cache-mb 0 turns it off
+"""
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Solve many puzzles in parallel")
+    parser.add_argument("jobs", nargs="?", help="jobs file (default: stdin)")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("--chunk-size", type=int, default=16, help="jobs sent to a worker at a time")
+    parser.add_argument("--output", help="results file (default: stdout)")
+    parser.add_argument("--cache-mb", type=int, default=64, help="memory budget of the result cache, in MB (0: no cache)")
+    parser.add_argument("--cache-file", help="file the result cache is loaded from and saved to")
+    options = parser.parse_args(arguments)
+    result_cache = cache.SolverCache(options.cache_mb * 1024 * 1024, options.cache_file) if options.cache_mb > 0 else None
+
+    jobs = open(options.jobs) if options.jobs else sys.stdin
+    output = open(options.output, "w") if options.output else sys.stdout
+    try:
+        for result in run_batch(jobs, options.workers, max(1, options.chunk_size), result_cache):
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+    finally:
+        if result_cache is not None and result_cache.path is not None:
+            result_cache.save()
+        if options.jobs:
+            jobs.close()
+        if options.output:
+            output.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import heapq
+from array import array
+from operator import itemgetter
+from board import SIZE, successor_function, path_from_moves, MOVES, NO_MOVE
+from greedy import make_heuristic
+
+""" Beam Search
+Breadth-first search that only keeps, in every depth layer, the 'width' states with the lowest heuristic value (any heuristic of greedy.py), so its memory has a hard ceiling whatever the instance: the search gives up optimality, and completeness, in exchange.
+Nothing but the current layer is kept as states. Every earlier layer is stored as two flat arrays, the move that reached each of its states and the index of its parent in the layer before, so memory is O(width x depth) at a few bytes per entry, and the path is rebuilt by replaying the moves from the initial state.
+Revisits are only detected against the current and previous layers: the board graph is bipartite, so a child can't be in the layer it is generated from, and the previous layer holds its grandparents
+"""
+DEFAULT_WIDTH = 1000
+DEFAULT_MAX_DEPTH = 1000
+
+""" Beam Search Algorithm
+Parameters like greedy_best_first_search, plus:
+- width - number of states kept per layer (K)
+- max_depth - number of layers after which the search gives up
+Returns the path found, or None when the beam dies out or max_depth is reached. The next layer is picked with heapq.nsmallest, a partial selection in O(n log K), from the distinct children of the current one (ties keep the generation order).
+A SearchStats object passed as 'stats' is filled in with the search statistics (see stats.py)
+"""
+def beam_search(initial_state, final_state, heuristic, size=SIZE, width=DEFAULT_WIDTH, max_depth=DEFAULT_MAX_DEPTH, stats=None):
+    if width < 1:
+        raise ValueError(f"Invalid beam width: {width}")
+    evaluate, update = make_heuristic(heuristic, final_state, size)
+    successors = successor_function(size)
+    if stats is not None:
+        successors = stats.timed(successors, "expansion_seconds")
+        update = stats.timed(update, "heuristic_seconds")
+    if initial_state == final_state:
+        return [initial_state] if stats is None else stats.finish([initial_state], max_depth=0)
+
+    """ Variables/Data Structures Initialization
+    - layer - the current layer, as (heuristic value, state, last move) entries
+    - previous - the states of the previous layer
+    - moves / parents - one pair of arrays per finished layer after the first: the move code (see board.MOVES) that reached each state, and the index of its parent in the layer before
+    """
+    layer = [(evaluate(initial_state), initial_state, NO_MOVE)]
+    previous = set()
+    moves = []
+    parents = []
+
+    """ Beam Loop
+    Every iteration expands the whole current layer into the next one
+    """
+    for depth in range(max_depth):
+        """ Children
+        Distinct children of the layer, by state: (heuristic value, state, move, parent index). The goal ends the search as soon as it is generated
+        """
+        children = {}
+        current = {state for h, state, last_move in layer}
+        for index, (h, state, last_move) in enumerate(layer):
+            generated = successors(state, last_move)
+            if stats is not None:
+                stats.expand(state, len(layer), len(generated))
+            for move, child in generated:
+                if child == final_state:
+                    path = rebuild_path(initial_state, moves, parents, index, move, size)
+                    return path if stats is None else stats.finish(path, max_depth=depth + 1)
+                if child in children or child in previous:
+                    if stats is not None:
+                        stats.duplicates += 1
+                    continue
+                children[child] = (update(h, state, child), child, move, index)
+        if not children:
+            break
+
+        """ Selection
+        The next layer is made of the 'width' best children; only their moves and parent indexes are kept
+        """
+        selected = heapq.nsmallest(width, children.values(), key=itemgetter(0))
+        moves.append(array("B", (move for h, child, move, index in selected)))
+        parents.append(array("I", (index for h, child, move, index in selected)))
+        previous = current
+        layer = [(h, child, move) for h, child, move, index in selected]
+
+    if stats is None:
+        return None
+    stats.max_depth = len(moves)
+    return stats.finish(None)
+
+""" Rebuild Path
+Follows the parent indexes back from the state at 'index' of the last layer, whose child was generated by 'move', and replays the collected moves from the initial state
+"""
+def rebuild_path(initial_state, moves, parents, index, move, size=SIZE):
+    codes = [move]
+    for layer in range(len(moves) - 1, -1, -1):
+        codes.append(moves[layer][index])
+        index = parents[layer][index]
+    return path_from_moves(initial_state, "".join(MOVES[code] for code in reversed(codes)), size)
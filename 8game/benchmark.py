@@ -0,0 +1,235 @@
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import board
+import greedy
+import oracle
+import solver
+from stats import SearchStats
+from measure import Measurement
+
+""" Benchmark Suite
+Reproducible benchmark of every solver over a fixed corpus of solvable 3x3 instances, stratified by optimal solution depth.
+- python benchmark.py corpus --output corpus.json - builds the seeded corpus
+- python benchmark.py run --output results.json [--corpus corpus.json] - runs the solvers and records wall time, nodes expanded and generated, peak memory and path length per instance
+- python benchmark.py compare baseline.json results.json - flags (solver, heuristic) pairs that got slower, use more memory or return longer paths than in the baseline, and exits with status 1 if any did
+Optimal depths come from the distance database (see oracle.py)
+"""
+
+""" Depth Buckets
+Ranges (inclusive) of optimal solution depths the corpus is stratified by. 31 is the largest depth of the 3x3 puzzle
+"""
+DEPTH_BUCKETS = [(0, 8), (9, 14), (15, 19), (20, 23), (24, 27), (28, 31)]
+
+""" Build Corpus
+Draws random instances with a seeded generator until every depth bucket has 'per_bucket' instances. Each instance is a random goal and a random start of the same parity, so all instances are solvable. Returns a list of {"start", "goal", "depth", "bucket"} dictionaries with tiles as flat lists
+"""
+def build_corpus(seed=0, per_bucket=5, buckets=DEPTH_BUCKETS, max_attempts=200000):
+    rng = random.Random(seed)
+    corpus = {bucket: [] for bucket in buckets}
+    for attempt in range(max_attempts):
+        if all(len(instances) >= per_bucket for instances in corpus.values()):
+            break
+        goal = rng.sample(range(9), 9)
+        final_state = board.from_tiles(goal)
+        """ Start Selection
+        Deep instances are drawn as random permutations (a random permutation is 22 moves away on average); shallow ones as short random walks from the goal
+        """
+        if attempt % 2:
+            start = rng.sample(range(9), 9)
+            initial_state = board.from_tiles(start)
+            if not board.is_solvable(initial_state, final_state):
+                continue
+        else:
+            initial_state = final_state
+            for step in range(rng.randrange(1, 30)):
+                initial_state = rng.choice(board.neighbors(initial_state))
+        depth = oracle.distance(initial_state, final_state)
+        for bucket in buckets:
+            if bucket[0] <= depth <= bucket[1] and len(corpus[bucket]) < per_bucket:
+                corpus[bucket].append({"start": board.to_tiles(initial_state), "goal": goal, "depth": depth, "bucket": f"{bucket[0]}-{bucket[1]}"})
+    return [instance for bucket in buckets for instance in corpus[bucket]]
+
+""" Solver Configurations
+Every (algorithm, heuristic) pair to benchmark: uninformed algorithms once, informed ones with every heuristic of greedy.py. The algorithms of solver.NONDETERMINISTIC_ALGORITHMS are only included when listed in 'algorithms': their counts vary between runs, so comparing them would report false regressions
+"""
+def solver_configurations(algorithms=None, heuristics=None):
+    configurations = []
+    for algorithm, (function, informed) in solver.ALGORITHMS.items():
+        if algorithms and algorithm not in algorithms:
+            continue
+        if not algorithms and algorithm in solver.NONDETERMINISTIC_ALGORITHMS:
+            continue
+        if informed:
+            configurations.extend((algorithm, heuristic) for heuristic in greedy.HEURISTICS if not heuristics or heuristic in heuristics)
+        else:
+            configurations.append((algorithm, None))
+    return configurations
+
+""" Run Instance
+Solves one instance and returns its measurements. The time is the best of 'repeat' plain runs; node counts (see stats.py) and, when requested, the peak memory are measured in a separate run, since both the statistics and tracemalloc slow the search down
+"""
+def run_instance(instance, algorithm, heuristic, measure_memory=True, repeat=1):
+    initial_state = board.from_tiles(instance["start"])
+    final_state = board.from_tiles(instance["goal"])
+    seconds = None
+    for run in range(max(1, repeat)):
+        start_time = time.perf_counter()
+        path = solver.solve(initial_state, final_state, algorithm, heuristic)
+        elapsed = time.perf_counter() - start_time
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+    result = {
+        "algorithm": algorithm,
+        "heuristic": heuristic,
+        "bucket": instance["bucket"],
+        "depth": instance["depth"],
+        "seconds": seconds,
+        "moves": None if path is None else len(path) - 1,
+    }
+    measurement = Measurement("full" if measure_memory else "off")
+    stats = SearchStats(on_goal=measurement.sample)
+    measurement.start()
+    solver.solve(initial_state, final_state, algorithm, heuristic, stats=stats)
+    measurement.stop()
+    if measure_memory:
+        result["peak_bytes"] = measurement.traced_peak
+    result["nodes_expanded"] = stats.nodes_expanded
+    result["nodes_generated"] = stats.nodes_generated
+    return result
+
+""" Summarize
+Aggregates the results per (algorithm, heuristic): total and median time, total nodes expanded, maximum peak memory, total moves and the number of non-optimal solutions
+"""
+def summarize(results):
+    groups = {}
+    for result in results:
+        groups.setdefault(configuration_name(result["algorithm"], result["heuristic"]), []).append(result)
+    summary = {}
+    for name, group in groups.items():
+        summary[name] = {
+            "instances": len(group),
+            "total_seconds": sum(result["seconds"] for result in group),
+            "median_seconds": statistics.median(result["seconds"] for result in group),
+            "nodes_expanded": sum(result["nodes_expanded"] for result in group),
+            "moves": sum(result["moves"] or 0 for result in group),
+            "non_optimal": sum(1 for result in group if result["moves"] != result["depth"]),
+        }
+        if all("peak_bytes" in result for result in group):
+            summary[name]["max_peak_bytes"] = max(result["peak_bytes"] for result in group)
+    return summary
+
+def configuration_name(algorithm, heuristic):
+    return algorithm if heuristic is None else f"{algorithm}/{heuristic}"
+
+""" Run Benchmark
+Runs every configuration over the corpus and returns the full report (environment, per-instance results, summary and errors).
+A configuration whose solver raises (e.g. a missing optional package or an unsupported board) is left out of the results and summary, and its error message is recorded under "errors", so one failing backend doesn't stop the suite
+"""
+def run_benchmark(corpus, configurations, measure_memory=True, repeat=1, progress=None):
+    results = []
+    errors = {}
+    for algorithm, heuristic in configurations:
+        name = configuration_name(algorithm, heuristic)
+        try:
+            configuration_results = [run_instance(instance, algorithm, heuristic, measure_memory, repeat) for instance in corpus]
+        except Exception as error:
+            errors[name] = f"{type(error).__name__}: {error}"
+            if progress:
+                progress(f"{name}: skipped ({errors[name]})")
+            continue
+        results.extend(configuration_results)
+        if progress:
+            progress(f"{name}: {sum(result['seconds'] for result in configuration_results):.3f} s")
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "instances": len(corpus),
+        "results": results,
+        "summary": summarize(results),
+        "errors": errors,
+    }
+
+""" Compare
+Compares two reports and returns the list of regressions: configurations whose total time, nodes expanded or peak memory grew by more than 'threshold' (relative), or that return more moves than before
+"""
+def compare(baseline, current, threshold=0.10):
+    regressions = []
+    for name, now in current["summary"].items():
+        before = baseline["summary"].get(name)
+        if before is None:
+            continue
+        if now["total_seconds"] > before["total_seconds"] * (1 + threshold):
+            regressions.append(f"{name}: time {before['total_seconds']:.3f} s -> {now['total_seconds']:.3f} s")
+        if "nodes_expanded" in before and now["nodes_expanded"] > before["nodes_expanded"] * (1 + threshold):
+            regressions.append(f"{name}: nodes expanded {before['nodes_expanded']} -> {now['nodes_expanded']}")
+        if "max_peak_bytes" in now and "max_peak_bytes" in before and now["max_peak_bytes"] > before["max_peak_bytes"] * (1 + threshold):
+            regressions.append(f"{name}: peak memory {before['max_peak_bytes']} B -> {now['max_peak_bytes']} B")
+        if now["moves"] > before["moves"]:
+            regressions.append(f"{name}: moves {before['moves']} -> {now['moves']}")
+    return regressions
+
+""" Command Line """
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Solver benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    corpus_parser = commands.add_parser("corpus", help="build the seeded instance corpus")
+    corpus_parser.add_argument("--seed", type=int, default=0)
+    corpus_parser.add_argument("--per-bucket", type=int, default=5)
+    corpus_parser.add_argument("--output", required=True)
+
+    run_parser = commands.add_parser("run", help="run the solvers over the corpus")
+    run_parser.add_argument("--corpus", help="corpus file (default: build one from --seed)")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--per-bucket", type=int, default=5)
+    run_parser.add_argument("--algorithms", help="comma separated algorithms (default: all but the parallel ones)")
+    run_parser.add_argument("--heuristics", help="comma separated heuristics (default: all)")
+    run_parser.add_argument("--repeat", type=int, default=1, help="runs per instance; the fastest is kept")
+    run_parser.add_argument("--no-memory", action="store_true", help="skip the traced peak memory run")
+    run_parser.add_argument("--output", required=True)
+
+    compare_parser = commands.add_parser("compare", help="flag regressions against a baseline report")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative growth of time and memory")
+
+    options = parser.parse_args(arguments)
+
+    if options.command == "corpus":
+        with open(options.output, "w") as f:
+            json.dump(build_corpus(options.seed, options.per_bucket), f)
+        return 0
+
+    if options.command == "run":
+        if options.corpus:
+            with open(options.corpus) as f:
+                corpus = json.load(f)
+        else:
+            corpus = build_corpus(options.seed, options.per_bucket)
+        algorithms = options.algorithms.split(",") if options.algorithms else None
+        for algorithm in algorithms or ():
+            if algorithm not in solver.ALGORITHMS:
+                print(f"Skipping {algorithm}: unknown algorithm or missing optional package", file=sys.stderr)
+        configurations = solver_configurations(algorithms, options.heuristics.split(",") if options.heuristics else None)
+        report = run_benchmark(corpus, configurations, not options.no_memory, options.repeat, progress=lambda line: print(line, file=sys.stderr))
+        with open(options.output, "w") as f:
+            json.dump(report, f, indent=1)
+        return 0
+
+    with open(options.baseline) as f:
+        baseline = json.load(f)
+    with open(options.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, options.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print("No regressions")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
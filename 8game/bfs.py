@@ -1,122 +1,197 @@
 from collections import deque
+from board import SIZE, successor_function, reconstruct_path, is_solvable, packed_bits
+from stats import tree_depth
+from compact import compact_store, ArrayQueue, STORAGES
 
-""" BFS Algorithm 
+""" BFS Structures
+Builds the structures of a breadth-first search from initial_state, shared by bfs_algorithm and multi_goal_bfs, and returns (frontier, explored_nodes, prev, successors):
+- frontier - queue that will store all the states to be explored - accomplished with deque
+- explored_nodes - is a set that stores the states that have already been visited to prevent revisiting
+- prev - is a dictionary mapping each state to the state that led to it, helping to reconstruct the path once the final state is found
+- successors - the shared successor generator for this board size (see board.py)
+With compact storage, one compact store serves as both 'explored_nodes' and 'prev', and the frontier is an ArrayQueue when states fit in 64 bits (see board.packed_bits). With 'stats', the successor generator and the dict structures are timed (see stats.py)
+"""
+def bfs_structures(initial_state, size=SIZE, stats=None, storage="dict"):
+    if storage not in STORAGES:
+        raise ValueError(f"Unknown storage: {storage}")
+    if storage == "compact":
+        explored_nodes = prev = compact_store(initial_state, size)
+        frontier = ArrayQueue([initial_state]) if packed_bits(size) <= 64 else deque([initial_state])
+    else:
+        frontier = deque([initial_state])
+        explored_nodes = {initial_state}
+        prev = {}
+    successors = successor_function(size)
+    if stats is not None:
+        successors = stats.timed(successors, "expansion_seconds")
+        if storage == "dict":
+            explored_nodes = stats.timed_set(explored_nodes)
+            prev = stats.timed_dict(prev)
+    return frontier, explored_nodes, prev, successors
+
+""" BFS Algorithm
 Implementation of the Breadth-first Algorithm function, having as parameters the initial_state and final_state taken as inputs in the main function, on index.py
+Both states are packed boards (see board.py) and the returned path is a list of packed boards
+A SearchStats object passed as 'stats' is filled in with the search statistics (see stats.py)
+'storage' selects how visited states are kept: 'dict' (a set and a dictionary) or 'compact' (a bitset and 2-bit move codes on 3x3 and smaller boards, a dictionary of move codes on larger ones, see compact.py)
 """
-def bfs_algorithm(initial_state, final_state):
+def bfs_algorithm(initial_state, final_state, size=SIZE, stats=None, storage="dict"):
     """ Variables/Data Structures Initialization
-    - frontier - queue that will store all the states to be explored - accomplished with deque
-    - explored_nodes - is a set that stores the states that have already been visited to prevent revisiting
-    - prev - is a dictionary mapping each state to the state that led to it, helping to reconstruct the path once the final state is found
-    - max_depth
+    'frontier', 'explored_nodes', 'prev' and 'successors' (see bfs_structures)
     """
-    frontier = deque([initial_state])
-    explored_nodes = set()
-    prev = {}
-    max_depth = 0
+    frontier, explored_nodes, prev, successors = bfs_structures(initial_state, size, stats, storage)
 
     """ BFS Loop
     This loop will run as long as there are states in 'frontier' to explore
     """
     while frontier:
         """ State exploration
-        board is the current state taken from the front of the queue. It's converted to a tuple of tuples to store in "explored_nodes"
+        board is the current state taken from the front of the queue. Packed boards are ints, so they are stored as they are in "explored_nodes"
         """
         board = frontier.popleft()
-        explored_nodes.add(tuple(map(tuple, board)))
         """ Final State Check
         If the current state is the goal state, the function reconstructs the path from the initial state to the final state using the 'prev' dictionary and returns it
         """
         if board == final_state:
-            return reconstruct_path(board, prev)
+            path = reconstruct_path(board, prev)
+            return path if stats is None else stats.finish(path, len(explored_nodes), tree_depth(prev))
         """ Neighbor Exploration
         For each valid move (or 'neighbor') from the current state
         """
-        for neighbor in neighbors(board):
+        children = successors(board)
+        if stats is not None:
+            stats.expand(board, len(frontier) + 1, len(children))
+        for move, neighbor in children:
             """ Exploration Check
             It checks if the neighbor hasn't been explored yet
             """
-            if tuple(map(tuple, neighbor)) not in explored_nodes:
+            if neighbor not in explored_nodes:
                 """ Neighbor Addition
-                The neighbor is added to the stack for exploration, marked as explored and current state is recorded as the neighbor's predecessor
+                The neighbor is added to the queue for exploration, marked as explored and current state is recorded as the neighbor's predecessor
                 """
                 frontier.append(neighbor)
-                explored_nodes.add(tuple(map(tuple, neighbor)))
-                prev[tuple(map(tuple, neighbor))] = tuple(map(tuple, board))
-                max_depth = max(max_depth, len(neighbor))
-    return None
+                explored_nodes.add(neighbor)
+                prev[neighbor] = board
+    return None if stats is None else stats.finish(None, len(explored_nodes), tree_depth(prev))
 
-""" Neighbors function
-Used to find all the possible states that can be reached from the current state of the 8-puzzle with a single tile move.
-It taked as parameter the current layout state of the game
+""" Multi-Goal BFS
+One-to-many version of bfs_algorithm: a single breadth-first search from initial_state serves every state of 'final_states'. It is a generator of (final_state, path) pairs, yielded as soon as each goal is reached, so callers can use the first paths while the search goes on. Paths are shortest paths, so goals come out in order of distance.
+Goals that can't be reached (see board.is_solvable) are yielded first, with None as path, and the search stops once every other goal has been found instead of exploring the whole state space. Parameters and 'stats' are like bfs_algorithm; stats are finished when the generator is exhausted
 """
-def neighbors(state):
-    """ Find the Empty Tile
-    It finds the coordinates (row, column) of the empty space
-    enumerate(state) gives us a pair of (index, row), where 'index' is the row number and 'row' is the list representing the row in the puzzle
-    row.index(0) finds the column index of the empty space('0') in the row
-    This information is used to determine which moves are possible
+def multi_goal_bfs(initial_state, final_states, size=SIZE, stats=None, storage="dict"):
+    """ Variables/Data Structures Initialization
+    Same structures as bfs_algorithm (see bfs_structures), plus 'remaining', the goals not reached yet
     """
-    empty_tile_position = [(i, row.index(0)) for i, row in enumerate(state) if 0 in row][0]
-    
-    neighbors = []
+    frontier, explored_nodes, prev, successors = bfs_structures(initial_state, size, stats, storage)
+    remaining = set()
+    for final_state in dict.fromkeys(final_states):
+        if not is_solvable(initial_state, final_state, size):
+            yield final_state, None
+        elif final_state == initial_state:
+            yield final_state, [initial_state]
+        else:
+            remaining.add(final_state)
+    if not remaining:
+        if stats is not None:
+            stats.finish(None, 1, 0)
+        return
 
-    """ Possible Moves (up, down, left, right)
-    This list defines the directions in which the empty tile can move: down, up, right, and left, respectively.
-    Each move is a tuple representing the change in the row and column of the empty space if that move is made.
+    """ Multi-Goal Loop
+    Goals are checked when they are first generated: in a breadth-first search, that is already along a shortest path
     """
-    moves = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-
-    """For each move possible"""
-    for move in moves:
-        new_row = empty_tile_position[0] + move[0]
-        new_col = empty_tile_position[1] + move[1]
-
-        """ Validate Move
-        This checks if the move is valid by ensuring the new position of the empty space is still within the bounds of the grid
-        """
-        if 0 <= new_row < len(state) and 0 <= new_col < len(state[0]):
-            """ Create New State 
-            A new state is created as a copy of the current state. The : is used to create a shallow copy of each row so that we don't alter the original state
-            """
-            neighbor_state = [row[:] for row in state]
-            """ Execute Move
-            The value at the new position of the empty space (which will be a numbered tile after the move) is moved to where the empty space was
-            The new position of the empty space is set to '0'
-            """
-            neighbor_state[empty_tile_position[0]][empty_tile_position[1]] = neighbor_state[new_row][new_col]
-            neighbor_state[new_row][new_col] = 0
-            """ Record Neighbor State
-            This modified 'neighbor_state' is added to the list 'neighbors', signifying it's a valid state reachable from the current state
-            """
-            neighbors.append(neighbor_state)
+    while frontier and remaining:
+        board = frontier.popleft()
+        children = successors(board)
+        if stats is not None:
+            stats.expand(board, len(frontier) + 1, len(children))
+        for move, neighbor in children:
+            if neighbor not in explored_nodes:
+                frontier.append(neighbor)
+                explored_nodes.add(neighbor)
+                prev[neighbor] = board
+                if neighbor in remaining:
+                    remaining.discard(neighbor)
+                    yield neighbor, reconstruct_path(neighbor, prev)
 
-    """ Return Neighbors
-    The function returns the list 'neighbors', which contains all the new states that can be reached with one move from the current state
+    """ Unreached Goals
+    Only possible if the state space was exhausted first, which doesn't happen for goals that passed the solvability check
     """
-    return neighbors
+    for final_state in remaining:
+        yield final_state, None
+    if stats is not None:
+        stats.finish(None, len(explored_nodes), tree_depth(prev))
 
-""" Reconstruct Path
-Used to traceback the path from the goal state to the initial state once a solution has been found using the DFS algorithm. It works by utilizing the information stored in the 'prev' dictionary, which holds the predecessors of each state visiting during the search
-It takes two parameters (state and prev)
+""" Bidirectional BFS Algorithm
+Breadth-first search that grows one tree from initial_state and another from final_state, with the same parameters and path format as bfs_algorithm.
+Each iteration expands a whole layer of the smaller frontier. Once a layer reaches a state already seen by the other search, the two 'prev' maps are joined at the meeting state that gives the shortest total path, so the returned path is optimal while each side only has to go about half as deep
 """
-def reconstruct_path(state, prev):
-    path = []
-    """ Tracing Back the Path 
-    The function enters a loop that will continue until there is no previous state to go back to, which happens when the initial state is reached and its 'prev' entry is 'None'
+def bidirectional_bfs(initial_state, final_state, size=SIZE, stats=None):
+    if initial_state == final_state:
+        return [initial_state] if stats is None else stats.finish([initial_state], 1, 0)
+    """ Variables/Data Structures Initialization
+    - forward_layer / backward_layer - the current frontier layer of each search
+    - forward_prev / backward_prev - map each state seen by a search to the state it was reached from (the initial and final state map to None). They also serve as that search's explored set
+    - forward_distance / backward_distance - map each state seen by a search to its number of moves from that search's root
+    - forward_depth / backward_depth - the number of moves from each search's root to its frontier layer
     """
-    while state is not None:
-        """ Append the Current State to the Path
-        The current state is added to the path list. In the first iteration, this is the goal state, and in subsequent iterations, it will be each predecessor state leading back to the initial state.
+    successors = successor_function(size)
+    forward_layer, backward_layer = [initial_state], [final_state]
+    forward_prev, backward_prev = {initial_state: None}, {final_state: None}
+    forward_depth, backward_depth = 0, 0
+    forward_distance, backward_distance = {initial_state: 0}, {final_state: 0}
+    if stats is not None:
+        successors = stats.timed(successors, "expansion_seconds")
+
+    """ Bidirectional Loop
+    It runs while both searches still have states to expand; if one of them runs out, the final state can't be reached
+    """
+    while forward_layer and backward_layer:
+        """ Side Selection
+        The search with the smaller frontier expands next
         """
-        path.append(state)
-        """ Move to the Previous State 
-        The current state is updated to its predecessor state. This is done by looking up the current state in the prev dictionary.
-        Since lists are not hashable and cannot be used as keys in a dictionary, the state, which is a list of lists, is converted to a tuple of tuples. Tuples are hashable and can be used as keys.
-        prev.get() is a safe way of retrieving the predecessor state from the dictionary; if the key doesn't exist, it returns None. (and the while loop ends)
+        if len(forward_layer) <= len(backward_layer):
+            layer, prev, distance, other_distance = forward_layer, forward_prev, forward_distance, backward_distance
+            forward_depth += 1
+            depth = forward_depth
+        else:
+            layer, prev, distance, other_distance = backward_layer, backward_prev, backward_distance, forward_distance
+            backward_depth += 1
+            depth = backward_depth
+
+        """ Layer Expansion
+        Every neighbor not seen yet by this search joins the next layer. Neighbors already seen by the other search are meeting states, and the one with the shortest total path is kept
         """
-        state = prev.get(tuple(map(tuple, state)))
-    """ Return the Reversed Path """
-    return path[::-1]
+        next_layer = []
+        meeting_state, meeting_length = None, None
+        for board in layer:
+            children = successors(board)
+            if stats is not None:
+                stats.expand(board, len(forward_layer) + len(backward_layer), len(children))
+            for move, neighbor in children:
+                if neighbor not in prev:
+                    prev[neighbor] = board
+                    distance[neighbor] = depth
+                    next_layer.append(neighbor)
+                    if neighbor in other_distance:
+                        length = depth + other_distance[neighbor]
+                        if meeting_length is None or length < meeting_length:
+                            meeting_state, meeting_length = neighbor, length
 
+        if meeting_state is not None:
+            """ Path Joining
+            The forward half is rebuilt as in bfs_algorithm; the backward half is followed from the meeting state towards the final state
+            """
+            path = reconstruct_path(meeting_state, forward_prev)
+            state = backward_prev[meeting_state]
+            while state is not None:
+                path.append(state)
+                state = backward_prev[state]
+            if stats is not None:
+                stats.finish(path, len(forward_prev) + len(backward_prev) - 1, max(forward_depth, backward_depth))
+            return path
 
+        if layer is forward_layer:
+            forward_layer = next_layer
+        else:
+            backward_layer = next_layer
+    return None if stats is None else stats.finish(None, len(forward_prev) + len(backward_prev) - 1, max(forward_depth, backward_depth))
@@ -0,0 +1,308 @@
+""" Board Representation
+Compact state type shared by bfs.py, dfs.py and greedy.py.
+A board is packed into a single Python int: tile at position p (row-major, p = row * size + col) occupies 'bits' bits starting at bit p * bits, and the index of the empty tile (0) is cached in the bits right after the last tile, except on 4x4 boards (see caches_blank).
+A 3x3 state takes 40 bits and a 4x4 state exactly 64 (see packed_bits), so both fit in structures of 64-bit integers (vector_bfs.py, compact.ArrayQueue, the records of external_bfs.py).
+Ints are hashable, cheap to compare and much smaller than a tuple of tuples, so they are used directly as keys in 'explored_nodes' and 'prev'.
+Conversion from and to the list of lists format used for input/output only happens in index.py
+"""
+SIZE = 3
+
+""" Tile Bits
+Number of bits needed to store one tile of a size x size board (4 bits for 3x3 and 4x4 boards)
+"""
+def tile_bits(size=SIZE):
+    return max(4, (size * size - 1).bit_length())
+
+""" Caches Blank
+Whether packed states of this size keep the index of the empty tile after the tiles. It saves looking for the empty tile at every move, so it is kept unless it is what pushes a state past 64 bits: the 16 tiles of a 4x4 board take exactly 64 bits, and their empty tile is found from the tiles instead (see blank_function)
+"""
+def caches_blank(size=SIZE):
+    tiles = size * size * tile_bits(size)
+    return tiles > 64 or tiles + (size * size - 1).bit_length() <= 64
+
+""" Pack
+Converts a matrix (list of lists) into the packed int representation
+"""
+def pack(matrix):
+    size = len(matrix)
+    bits = tile_bits(size)
+    state = 0
+    blank = 0
+    for position, tile in enumerate(tile for row in matrix for tile in row):
+        if tile == 0:
+            blank = position
+        state |= tile << (position * bits)
+    if caches_blank(size):
+        state |= blank << (size * size * bits)
+    return state
+
+""" Packed Bits
+Number of bits of a packed state, with its cached blank index when there is one: 40 for 3x3 and 64 for 4x4
+"""
+def packed_bits(size=SIZE):
+    bits = size * size * tile_bits(size)
+    return bits + (size * size - 1).bit_length() if caches_blank(size) else bits
+
+""" Unpack
+Converts a packed state back into a matrix (list of lists)
+"""
+def unpack(state, size=SIZE):
+    tiles = to_tiles(state, size)
+    return [tiles[i:i + size] for i in range(0, len(tiles), size)]
+
+""" To Tiles
+Returns the flat, row-major list of tiles of a packed state
+"""
+def to_tiles(state, size=SIZE):
+    bits = tile_bits(size)
+    mask = (1 << bits) - 1
+    return [(state >> (position * bits)) & mask for position in range(size * size)]
+
+""" From Tiles
+Packs a flat, row-major list of tiles
+"""
+def from_tiles(tiles, size=SIZE):
+    return pack([list(tiles[i:i + size]) for i in range(0, len(tiles), size)])
+
+""" Blank Function
+Returns the function that gives the position of the empty tile of a packed state, built once per board size and cached. With a cached index it is a shift.
+Otherwise the empty tile is the only tile field equal to zero: subtracting 1 from every field only sets the top bit of a field that was zero (and, through its borrow, maybe of fields above it), so the lowest flagged field is the empty tile
+"""
+_blank_functions = {}
+
+def blank_function(size=SIZE):
+    blank = _blank_functions.get(size)
+    if blank is None:
+        bits = tile_bits(size)
+        if caches_blank(size):
+            blank_shift = size * size * bits
+
+            def blank(state):
+                return state >> blank_shift
+        else:
+            ones = sum(1 << (position * bits) for position in range(size * size))
+            highs = ones << (bits - 1)
+
+            def blank(state):
+                flags = (state - ones) & ~state & highs
+                return (flags & -flags).bit_length() // bits - 1
+        _blank_functions[size] = blank
+    return blank
+
+""" Blank Position
+Returns the index of the empty tile
+"""
+def blank_position(state, size=SIZE):
+    return blank_function(size)(state)
+
+""" Moves
+Codes of the four directions in which the empty tile can move: down, up, right and left, which is also the order in which every solver expands successors. The move that undoes a move is always 'move ^ 1'.
+NO_MOVE is used as the "last move" of a state that has no parent
+"""
+MOVES = "DURL"
+NO_MOVE = 4
+_move_tables = {}
+
+""" Move Table
+Built once per board size and cached. table[blank][last_move] is a tuple of (move, shift, factor, offset) entries, one for every legal move of the empty tile from position 'blank', excluding the move that would undo 'last_move'.
+- shift - position, in bits, of the tile that is swapped with the empty tile
+- factor - multiplying the tile value by it moves the tile from its position to the empty position
+- offset - updates the cached blank index (0 when the size doesn't cache it)
+With these, a child is computed as: state + ((state >> shift) & mask) * factor + offset, so no bounds checks or copies happen per node
+"""
+def move_table(size=SIZE):
+    table = _move_tables.get(size)
+    if table is None:
+        bits = tile_bits(size)
+        blank_shift = size * size * bits if caches_blank(size) else None
+        table = []
+        for blank in range(size * size):
+            row, col = divmod(blank, size)
+            entries = []
+            for move, (new_row, new_col) in enumerate(((row + 1, col), (row - 1, col), (row, col + 1), (row, col - 1))):
+                if 0 <= new_row < size and 0 <= new_col < size:
+                    target = new_row * size + new_col
+                    entries.append((move, target * bits, (1 << (blank * bits)) - (1 << (target * bits)), 0 if blank_shift is None else (target - blank) << blank_shift))
+            table.append(tuple(tuple(entry for entry in entries if entry[0] != last_move ^ 1) for last_move in range(NO_MOVE + 1)))
+        table = _move_tables[size] = tuple(table)
+    return table
+
+""" Successor Function
+Returns the successor generator for boards of the given size. The table, mask and shift are bound once, so the generator itself only does a few index lookups and integer operations per child (plus the search for the empty tile on boards that don't cache it, see blank_function).
+The generator takes a packed state and, optionally, the move that led to it, and returns a list of (move, child) pairs
+"""
+def successor_function(size=SIZE):
+    table = move_table(size)
+    mask = (1 << tile_bits(size)) - 1
+    if not caches_blank(size):
+        blank = blank_function(size)
+
+        def successors(state, last_move=NO_MOVE):
+            return [(move, state + ((state >> shift) & mask) * factor + offset) for move, shift, factor, offset in table[blank(state)][last_move]]
+        return successors
+    blank_shift = size * size * tile_bits(size)
+
+    def successors(state, last_move=NO_MOVE):
+        return [(move, state + ((state >> shift) & mask) * factor + offset) for move, shift, factor, offset in table[state >> blank_shift][last_move]]
+    return successors
+
+""" Neighbors function
+Used to find all the possible states that can be reached from the current state with a single tile move.
+It takes as parameters the packed state and the board size
+"""
+def neighbors(state, size=SIZE):
+    return [child for move, child in successor_function(size)(state)]
+
+""" Reconstruct Path
+Used to traceback the path from the goal state to the initial state once a solution has been found. It works by utilizing the information stored in the 'prev' dictionary, which holds the predecessor of each state visited during the search
+The initial state is the only one whose 'prev' entry is missing or None
+"""
+def reconstruct_path(state, prev):
+    path = []
+    while state is not None:
+        path.append(state)
+        state = prev.get(state)
+    return path[::-1]
+
+""" Rank
+Returns the position of the board's tile permutation in lexicographic order (its Lehmer code), a number between 0 and (size * size)! - 1.
+It is used to index flat tables (files, bitsets, arrays) by state
+"""
+def rank(state, size=SIZE):
+    bits = tile_bits(size)
+    mask = (1 << bits) - 1
+    count = size * size
+    result = 0
+    seen = 0
+    """ Lehmer Digits
+    The digit of each position is the number of smaller tiles that come after it, which is the tile value minus the number of smaller tiles already seen
+    """
+    for position in range(count):
+        tile = (state >> (position * bits)) & mask
+        result = result * (count - position) + tile - (seen & ((1 << tile) - 1)).bit_count()
+        seen |= 1 << tile
+    return result
+
+""" Unrank
+Inverse of rank: rebuilds the packed state with the given Lehmer code
+"""
+def unrank(value, size=SIZE):
+    count = size * size
+    digits = []
+    for base in range(1, count + 1):
+        value, digit = divmod(value, base)
+        digits.append(digit)
+    remaining = list(range(count))
+    return from_tiles([remaining.pop(digit) for digit in reversed(digits)], size)
+
+""" Canonical Goal
+Returns the goal with tiles 1, 2, 3, ... in order and the empty tile at position 'blank' (by default the last position)
+"""
+def canonical_goal(blank=None, size=SIZE):
+    count = size * size
+    if blank is None:
+        blank = count - 1
+    tiles = list(range(1, count))
+    tiles.insert(blank, 0)
+    return from_tiles(tiles, size)
+
+""" Goal Relabeling
+Returns the tile mapping that turns 'final_state' into the canonical goal with the empty tile at the same position. Applying the same mapping (see relabel) to any other board keeps its distance to 'final_state', so solving against any goal reduces to solving against one of the canonical goals
+"""
+def goal_relabeling(final_state, size=SIZE):
+    mapping = [0] * (size * size)
+    for goal_tile, canonical_tile in zip(to_tiles(final_state, size), to_tiles(canonical_goal(blank_position(final_state, size), size), size)):
+        mapping[goal_tile] = canonical_tile
+    return mapping
+
+""" Relabel
+Renames every tile of a board according to 'mapping' (a list indexed by tile). The empty tile must map to itself
+"""
+def relabel(state, mapping, size=SIZE):
+    bits = tile_bits(size)
+    mask = (1 << bits) - 1
+    result = state >> (size * size * bits) << (size * size * bits)
+    for position in range(size * size):
+        result |= mapping[(state >> (position * bits)) & mask] << (position * bits)
+    return result
+
+""" Permutation Parity
+Parity of the number of inversions of a flat sequence of tiles, ignoring the empty tile, in O(n) without counting them: a permutation of m elements made of c cycles is a product of m - c swaps, and every swap flips the inversion parity.
+The tiles must be 0..n-1 in any order (a board); the non-empty tiles, in order, map position i to tile i + 1
+"""
+def permutation_parity(sequence):
+    order = [tile - 1 for tile in sequence if tile != 0]
+    seen = bytearray(len(order))
+    cycles = 0
+    for start in range(len(order)):
+        if not seen[start]:
+            cycles += 1
+            index = start
+            while not seen[index]:
+                seen[index] = 1
+                index = order[index]
+    return (len(order) - cycles) % 2
+
+""" Solvable Puzzle ?
+Determines if the puzzle can be solved by comparing the parity of the initial and final states. Puzzles are solvable if and only if both have the same parity.
+On boards of odd width, a vertical move jumps a tile over an even number of tiles (size - 1), so the inversion parity never changes and is the parity used. On boards of even width it jumps over an odd number and the inversion parity flips with every change of the empty tile's row, so the parity is the one of inversions plus the row of the empty tile
+"""
+def is_solvable(initial_state, final_state, size=SIZE):
+    return solvability_parity(initial_state, size) == solvability_parity(final_state, size)
+
+def solvability_parity(state, size=SIZE):
+    parity = permutation_parity(to_tiles(state, size))
+    if size % 2 == 0:
+        parity ^= (blank_position(state, size) // size) % 2
+    return parity
+
+""" Path Moves
+Generator of the moves (indices into MOVES) made along a path of packed states. Works on any iterable of states, so long paths never have to be copied
+"""
+def path_moves(path, size=SIZE):
+    moves = {size: 0, -size: 1, 1: 2, -1: 3}
+    states = iter(path)
+    before = next(states, None)
+    for after in states:
+        yield moves[blank_position(after, size) - blank_position(before, size)]
+        before = after
+
+""" Move String
+Describes a path as the directions in which the empty tile moves at each step, e.g. "UULDR" (see MOVES)
+"""
+def move_string(path, size=SIZE):
+    return "".join(MOVES[move] for move in path_moves(path, size))
+
+""" Path From Moves
+Inverse of move_string: replays a string of moves from 'state' and returns the visited states. Raises ValueError on illegal moves
+"""
+def path_from_moves(state, moves, size=SIZE):
+    successors = successor_function(size)
+    path = [state]
+    for direction in moves:
+        move = MOVES.index(direction)
+        for child_move, child in successors(state):
+            if child_move == move:
+                state = child
+                break
+        else:
+            raise ValueError(f"Illegal move {direction} at step {len(path)}")
+        path.append(state)
+    return path
+
+""" Successor Benchmark
+Running "python board.py" times the successor generator on a random walk of states, which is the innermost loop of every solver
+"""
+if __name__ == "__main__":
+    import random
+    import timeit
+
+    successors = successor_function()
+    state = pack([[1, 2, 3], [4, 5, 6], [7, 8, 0]])
+    states = []
+    for _ in range(1000):
+        states.append(state)
+        state = random.choice(successors(state))[1]
+    runs = 200
+    seconds = timeit.timeit(lambda: [successors(state) for state in states], number=runs)
+    print(f"Successor generation:\t{round(seconds / (runs * len(states)) * 1e9)} ns per state")
@@ -0,0 +1,49 @@
+from collections import deque
+
+""" Bucket Queue
+Priority queue for small non-negative integer priorities, such as heuristic values and f = g + h on the puzzle.
+There is one bucket (a list, or a deque in FIFO mode) per priority and an index of the lowest bucket that may be non-empty, so push and pop cost O(1) amortized, instead of the O(log n) of heapq, and items are never compared with each other.
+Ties are broken explicitly: 'lifo' pops the most recently pushed item of the lowest priority first, 'fifo' the oldest one
+"""
+class BucketQueue:
+    def __init__(self, order="lifo"):
+        if order not in ("lifo", "fifo"):
+            raise ValueError(f"Unknown tie-breaking order: {order}")
+        self.fifo = order == "fifo"
+        self.buckets = []
+        self.minimum = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __bool__(self):
+        return self.size > 0
+
+    """ Push
+    Adds 'item' with the given priority, creating buckets up to that priority when needed
+    """
+    def push(self, priority, item):
+        buckets = self.buckets
+        while len(buckets) <= priority:
+            buckets.append(deque() if self.fifo else [])
+        buckets[priority].append(item)
+        if priority < self.minimum:
+            self.minimum = priority
+        self.size += 1
+
+    """ Pop
+    Removes and returns (priority, item) for the lowest priority. Raises IndexError when the queue is empty
+    """
+    def pop(self):
+        if not self.size:
+            raise IndexError("pop from an empty bucket queue")
+        buckets = self.buckets
+        minimum = self.minimum
+        while not buckets[minimum]:
+            minimum += 1
+        self.minimum = minimum
+        self.size -= 1
+        if self.fifo:
+            return minimum, buckets[minimum].popleft()
+        return minimum, buckets[minimum].pop()
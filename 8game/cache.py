@@ -0,0 +1,134 @@
+import json
+import os
+from collections import OrderedDict
+import board
+import solver
+
+""" Solver Cache
+Result cache in front of solver.solve, for workloads where the same queries come back often. It is used by the daemon (daemon.py), the batch runner (batch.py) and, with --cache-file, the interactive game (index.py).
+Queries are normalized by relabeling the tiles so that the goal becomes the canonical goal with the empty tile at the same position (see board.goal_relabeling). Relabeled queries are equivalent: the same moves solve both, so pairs that only differ by tile names share one entry.
+Entries are keyed by (algorithm, heuristic, size, canonical goal, relabeled start) and store the solution as a move string, which is replayed from the caller's start to rebuild the path. Deterministic algorithms return exactly what they would have returned; greedy searches return a valid solution of the same quality, but ties may be broken differently than in a fresh run
+"""
+
+""" Entry Overhead
+Approximate memory, in bytes, used by one entry besides its move string (key tuple, ints, OrderedDict node)
+"""
+ENTRY_OVERHEAD = 400
+
+class SolverCache:
+    """ Initialization
+    - max_bytes - memory budget; the least recently used entries are evicted to stay below it
+    - path - optional file the cache is loaded from (if it exists) and saved to with save()
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024, path=None):
+        self.max_bytes = max_bytes
+        self.path = path
+        self.entries = OrderedDict()
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    """ Key
+    Normalizes a query. Returns the cache key and the relabeled start
+    """
+    def key(self, initial_state, final_state, algorithm, heuristic, size):
+        if algorithm not in solver.ALGORITHMS:
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        if solver.ALGORITHMS[algorithm][1]:
+            heuristic = heuristic or solver.DEFAULT_HEURISTIC
+        else:
+            heuristic = None
+        mapping = board.goal_relabeling(final_state, size)
+        canonical_goal = board.canonical_goal(board.blank_position(final_state, size), size)
+        return (algorithm, heuristic, size, canonical_goal, board.relabel(initial_state, mapping, size))
+
+    """ Solve
+    Like solver.solve, without budgets and beam widths (their results depend on them, so they are not cached). On a miss, the search runs on the relabeled query, so its result can be reused by every equivalent query; 'storage' is passed on to it.
+    A SearchStats object passed as 'stats' can only be filled in by a search: the cache is not looked up, the search runs on the caller's query, and its solution is stored
+    """
+    def solve(self, initial_state, final_state, algorithm, heuristic=None, size=board.SIZE, stats=None, storage=None):
+        key = self.key(initial_state, final_state, algorithm, heuristic, size)
+        if stats is not None:
+            path = solver.solve(initial_state, final_state, algorithm, heuristic, size, stats=stats, storage=storage)
+            self.store(key, None if path is None else board.move_string(path, size))
+            return path
+        found, moves = self.lookup(key)
+        if not found:
+            path = solver.solve(key[4], key[3], algorithm, key[1], size, storage=storage)
+            moves = None if path is None else board.move_string(path, size)
+            self.store(key, moves)
+        if moves is None:
+            return None
+        return board.path_from_moves(initial_state, moves, size)
+
+    """ Lookup
+    Returns (True, moves) for a cached key, marking it as the most recently used, or (False, None). Counts a hit or a miss
+    """
+    def lookup(self, key):
+        if key not in self.entries:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return True, self.entries[key]
+
+    """ Store
+    Adds an entry (None for queries without solution) and evicts the least recently used entries while over budget
+    """
+    def store(self, key, moves):
+        if key in self.entries:
+            self.used_bytes -= self.entry_size(self.entries.pop(key))
+        self.entries[key] = moves
+        self.used_bytes += self.entry_size(moves)
+        while self.used_bytes > self.max_bytes and self.entries:
+            evicted_key, evicted_moves = self.entries.popitem(last=False)
+            self.used_bytes -= self.entry_size(evicted_moves)
+            self.evictions += 1
+
+    """ Entry Size
+    Approximate memory used by one entry
+    """
+    @staticmethod
+    def entry_size(moves):
+        return ENTRY_OVERHEAD + (len(moves) if moves else 0)
+
+    """ Statistics
+    Hit/miss counters and memory use
+    """
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "used_bytes": self.used_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        self.entries.clear()
+        self.used_bytes = 0
+
+    """ Save
+    Writes the entries, from least to most recently used, as JSON to 'path' (by default the file given at initialization). The file is replaced atomically
+    """
+    def save(self, path=None):
+        path = path or self.path
+        if path is None:
+            raise ValueError("No cache file given")
+        with open(path + ".tmp", "w") as f:
+            json.dump([list(key) + [moves] for key, moves in self.entries.items()], f)
+        os.replace(path + ".tmp", path)
+
+    """ Load
+    Adds the entries saved in 'path', keeping their recency order
+    """
+    def load(self, path):
+        with open(path) as f:
+            for algorithm, heuristic, size, canonical_goal, start, moves in json.load(f):
+                self.store((algorithm, heuristic, size, canonical_goal, start), moves)
@@ -0,0 +1,276 @@
+import sys
+from array import array
+from math import factorial
+from board import SIZE, tile_bits, move_table, solvability_parity, blank_function, from_tiles, NO_MOVE
+
+""" Compact Storage
+Alternative to the 'explored_nodes' set and 'prev' dictionary of the solvers (storage="compact" in bfs.py, dfs.py and greedy.py). compact_store picks a CompactStore for boards whose states can all be numbered in a flat table (3x3 and smaller), and a HashedStore for larger ones.
+Every state is numbered by the position of its empty tile and the Lehmer rank of its other tiles. Only half of the tile orders can be reached for a given empty position (see board.is_solvable), and the ranks 2k and 2k + 1 differ by a swap of the last two tiles, so rank // 2 numbers the reachable ones: 9 * 8! / 2 = 181,440 states for 3x3.
+- visited - one bit per state
+- moves - for every visited state, the 2-bit code of the move (see board.MOVES) that reached it. A parent is rebuilt by undoing that move, so no state is stored at all
+Together they take 68 KB for 3x3, instead of tens of MB for a set and a dictionary of ints
+"""
+STORAGES = ("dict", "compact")
+MAX_STATES = 1 << 32
+
+""" Compact Store Factory
+Returns the compact store of a search from initial_state: a CompactStore when the board has at most MAX_STATES states, a HashedStore otherwise
+"""
+def compact_store(initial_state, size=SIZE):
+    count = size * size
+    if count * factorial(count - 1) // 2 > MAX_STATES:
+        return HashedStore(initial_state, size)
+    return CompactStore(initial_state, size)
+
+""" Undo Table
+undo[blank][move] is the move table entry (shift, factor, offset, see board.move_table) that takes back 'move' when the empty tile is at 'blank'
+"""
+def undo_table(size=SIZE):
+    undo = [[None] * 4 for blank in range(size * size)]
+    for blank, entries in enumerate(move_table(size)):
+        for move, shift, factor, offset in entries[NO_MOVE]:
+            undo[blank][move ^ 1] = (shift, factor, offset)
+    return undo
+
+""" Directions
+Maps the change of position of the empty tile to the code of the move (see board.MOVES)
+"""
+def directions(size=SIZE):
+    return {size: 0, -size: 1, 1: 2, -1: 3}
+
+class CompactStore:
+    def __init__(self, initial_state, size=SIZE):
+        count = size * size
+        self.size = size
+        self.bits = tile_bits(size)
+        self.mask = (1 << self.bits) - 1
+        self.blank = blank_function(size)
+        self.half = factorial(count - 1) // 2
+        capacity = count * self.half
+        if capacity > MAX_STATES:
+            raise ValueError(f"Compact storage only supports boards with at most {MAX_STATES} states")
+        self.visited = bytearray((capacity + 7) // 8)
+        self.moves = bytearray((capacity + 3) // 4)
+        self.count = 0
+        self.undo = undo_table(size)
+        self.directions = directions(size)
+        """ Digit Table
+        digits[blank] lists, for every position but the empty one, its shift in the packed state and the weight of its Lehmer digit
+        """
+        self.digits = [tuple((position * self.bits, factorial(count - 2 - rank)) for rank, position in enumerate(p for p in range(count) if p != blank)) for blank in range(count)]
+        self.parity = self.invariant(initial_state)
+        self.last_state = None
+        self.last_index = None
+        self.root = self.index(initial_state)
+        self.add(initial_state)
+
+    """ Index
+    Number of a state in the tables, between 0 and size * size * (size * size - 1)! / 2 - 1. The solvers look up the same state several times in a row (membership, then insertion), so the last index is cached
+    """
+    def index(self, state):
+        if state == self.last_state:
+            return self.last_index
+        mask = self.mask
+        blank = self.blank(state)
+        result = 0
+        seen = 0
+        for shift, weight in self.digits[blank]:
+            tile = (state >> shift) & mask
+            result += (tile - 1 - (seen & ((1 << tile) - 1)).bit_count()) * weight
+            seen |= 1 << tile
+        self.last_state = state
+        self.last_index = blank * self.half + (result >> 1)
+        return self.last_index
+
+    """ Invariant
+    Parity that no move changes (see board.solvability_parity): the parity of the tile order (ignoring the empty tile), plus the row of the empty tile on boards of even width
+    """
+    def invariant(self, state):
+        return solvability_parity(state, self.size)
+
+    """ Unindex
+    Inverse of index: rebuilds the state with the given number, taking the tile order of the same parity as the initial state
+    """
+    def unindex(self, value):
+        blank, rank = divmod(value, self.half)
+        count = self.size * self.size
+        digits = []
+        rank *= 2
+        for base in range(1, count):
+            rank, digit = divmod(rank, base)
+            digits.append(digit)
+        remaining = list(range(1, count))
+        order = [remaining.pop(digit) for digit in reversed(digits)]
+        state = self.build(order, blank)
+        if self.invariant(state) != self.parity:
+            order[-1], order[-2] = order[-2], order[-1]
+            state = self.build(order, blank)
+        return state
+
+    def build(self, order, blank):
+        tiles = list(order)
+        tiles.insert(blank, 0)
+        return from_tiles(tiles, self.size)
+
+    """ Set Interface
+    'in', add and len, as used on 'explored_nodes'
+    """
+    def __contains__(self, state):
+        value = self.index(state)
+        return (self.visited[value >> 3] >> (value & 7)) & 1 == 1
+
+    def add(self, state):
+        value = self.index(state)
+        if not (self.visited[value >> 3] >> (value & 7)) & 1:
+            self.visited[value >> 3] |= 1 << (value & 7)
+            self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    """ Iteration
+    Yields every visited state. Only used for statistics, since every state has to be rebuilt from its number
+    """
+    def __iter__(self):
+        for byte_index, byte in enumerate(self.visited):
+            while byte:
+                low = byte & -byte
+                yield self.unindex(byte_index * 8 + low.bit_length() - 1)
+                byte ^= low
+
+    """ Dictionary Interface
+    prev[child] = parent records the move from 'parent' to 'child'; get(state) undoes it. The initial state has no parent, so get returns None for it, like for a state that was never visited
+    """
+    def __setitem__(self, child, parent):
+        move = self.directions[self.blank(child) - self.blank(parent)]
+        value = self.index(child)
+        shift = (value & 3) * 2
+        self.moves[value >> 2] = (self.moves[value >> 2] & ~(3 << shift)) | (move << shift)
+
+    def get(self, state, default=None):
+        if state not in self:
+            return default
+        value = self.index(state)
+        if value == self.root:
+            return None
+        move = (self.moves[value >> 2] >> ((value & 3) * 2)) & 3
+        shift, factor, offset = self.undo[self.blank(state)][move]
+        return state + ((state >> shift) & self.mask) * factor + offset
+
+    """ Tree Depth
+    Depth of the deepest visited state (see stats.tree_depth), with the depths kept in a flat array indexed by state number
+    """
+    def tree_depth(self):
+        depths = array("I", bytes(4 * len(self.visited) * 8))
+        known = bytearray(len(self.visited) * 8)
+        known[self.root] = 1
+        deepest = 0
+        for state in self:
+            chain = []
+            value = self.index(state)
+            while not known[value]:
+                chain.append(value)
+                state = self.get(state)
+                value = self.index(state)
+            depth = depths[value]
+            for value in reversed(chain):
+                depth += 1
+                depths[value] = depth
+                known[value] = 1
+            deepest = max(deepest, depth)
+        return deepest
+
+    """ Memory
+    Number of bytes taken by the tables
+    """
+    def nbytes(self):
+        return len(self.visited) + len(self.moves)
+
+""" Hashed Store
+Compact storage for boards with too many states for a flat table (4x4 and larger): a single dictionary maps every visited state to the code of the move that reached it (NO_MOVE for the initial state), instead of a set of states and a dictionary of parents. Parents are rebuilt by undoing the move like in CompactStore, and the codes are small ints shared by every entry, so no parent int is kept per state
+"""
+class HashedStore:
+    def __init__(self, initial_state, size=SIZE):
+        self.size = size
+        self.mask = (1 << tile_bits(size)) - 1
+        self.blank = blank_function(size)
+        self.undo = undo_table(size)
+        self.directions = directions(size)
+        self.codes = {initial_state: NO_MOVE}
+
+    """ Set Interface
+    'in', add and len, as used on 'explored_nodes'. add keeps the code of a state already visited
+    """
+    def __contains__(self, state):
+        return state in self.codes
+
+    def add(self, state):
+        self.codes.setdefault(state, NO_MOVE)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        return iter(self.codes)
+
+    """ Dictionary Interface
+    prev[child] = parent records the move from 'parent' to 'child'; get(state) undoes it, and returns None for the initial state and for states that were never visited
+    """
+    def __setitem__(self, child, parent):
+        self.codes[child] = self.directions[self.blank(child) - self.blank(parent)]
+
+    def get(self, state, default=None):
+        move = self.codes.get(state)
+        if move is None:
+            return default
+        if move == NO_MOVE:
+            return None
+        shift, factor, offset = self.undo[self.blank(state)][move]
+        return state + ((state >> shift) & self.mask) * factor + offset
+
+    """ Tree Depth
+    Depth of the deepest visited state (see stats.tree_depth)
+    """
+    def tree_depth(self):
+        depths = {}
+        deepest = 0
+        for state in self.codes:
+            chain = []
+            while state is not None and state not in depths:
+                chain.append(state)
+                state = self.get(state)
+            depth = -1 if state is None else depths[state]
+            for state in reversed(chain):
+                depth += 1
+                depths[state] = depth
+            deepest = max(deepest, depth)
+        return deepest
+
+    """ Memory
+    Number of bytes taken by the dictionary table (the state ints are not counted)
+    """
+    def nbytes(self):
+        return sys.getsizeof(self.codes)
+
+""" Array Queue
+FIFO queue of states in two arrays of 64-bit integers (8 bytes per state instead of a pointer and an int object), with the append/popleft interface of collections.deque. States of boards up to 4x4 fit (see board.packed_bits). States are appended to 'tail'; when 'head' is empty, the tail is reversed and becomes the head
+"""
+class ArrayQueue:
+    def __init__(self, items=()):
+        self.head = array("Q")
+        self.tail = array("Q", items)
+
+    def append(self, item):
+        self.tail.append(item)
+
+    def popleft(self):
+        if not self.head:
+            self.head, self.tail = self.tail, self.head
+            self.head.reverse()
+        return self.head.pop()
+
+    def __len__(self):
+        return len(self.head) + len(self.tail)
+
+    def __bool__(self):
+        return bool(self.head) or bool(self.tail)
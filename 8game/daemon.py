@@ -0,0 +1,376 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import board
+import batch
+import cache
+import greedy
+import pattern_database
+import solver
+
+""" Solver Daemon
+Long-running solver service for callers that make many small queries, so they pay neither the process startup nor the cold tables of a fresh run. It listens on a Unix socket and speaks line-delimited JSON: every line sent is one message, and every answer is one line.
+- {"id": 1, "start": "1,2,3,4,0,5,7,8,6", "goal": "1,2,3,4,5,6,7,8,0", "algorithm": "astar", "heuristic": "manhattan", "timeout": 2.5} - solves a query. Tiles are written like in batch.py; "heuristic" and "timeout" (seconds) are optional
+- {"cancel": 1} - cancels the query with id 1 of the same connection, which is answered with the "cancelled" status
+- {"id": 2, "stats": true} - answers with the cache and request counters
+Answers carry the query's "id" and fields, and a status: "solved" (with "moves", "solution" as a move string, "seconds" spent solving and "cached"), "no solution", "unsolvable", "invalid", "error", "timeout" or "cancelled". They come out in completion order.
+Queries are normalized and cached like in cache.py, in the daemon process. Misses arriving within a short window (BATCH_WINDOW) are collected into batches, which are split in a few chunks per worker (so a slow search only holds back the queries of its own chunk) and sent to a pool of processes whose move tables and heuristics are built at startup and kept between searches (see warm_worker and greedy.keep_heuristics). Identical queries waiting at the same time share one search
+"""
+SOCKET_PATH = os.path.join(tempfile.gettempdir(), "8game.sock")
+BATCH_WINDOW = 0.005
+MAX_BATCH = 64
+CHUNKS_PER_WORKER = 4
+WARM_SIZES = (3, 4)
+STREAM_LIMIT = 1 << 20
+
+""" Warm Worker
+Initializer of the worker processes: keeps the heuristics built by the searches (see greedy.keep_heuristics) and builds, for every board size in 'sizes', the move table and the heuristics toward every canonical goal (walking distance only up to greedy.MAX_WALKING_SIZE). Pattern databases are only loaded when they were built ahead of time (see pattern_database.main), since building them takes seconds
+"""
+def warm_worker(sizes):
+    greedy.keep_heuristics()
+    for size in sizes:
+        board.move_table(size)
+        for blank in range(size * size):
+            goal = board.canonical_goal(blank, size)
+            for heuristic in ("manhattan", "hamming", "linear_conflict"):
+                greedy.make_heuristic(heuristic, goal, size)
+            if size <= greedy.MAX_WALKING_SIZE:
+                greedy.make_heuristic("walking_distance", goal, size)
+            try:
+                groups = pattern_database.goal_groups(goal, size)
+            except ValueError:
+                continue
+            if all(os.path.exists(pattern_database.database_path(group, size)) for group in groups):
+                greedy.make_heuristic("pattern_database", goal, size)
+
+""" Solve Queries
+Worker entry point: solves a chunk of (cache key, deadline) pairs, where a key is a normalized query (see cache.SolverCache.key) and the deadline is a time.monotonic() value, shared by every process of the machine.
+Returns one (status, moves, seconds) tuple per query. Queries whose deadline has passed before they start are skipped with the "timeout" status; a search that has started runs to the end, and its result is still cached. Any error raised by the solver is returned with the "error" status, so one failing query doesn't fail its whole chunk
+"""
+def solve_queries(queries):
+    results = []
+    for key, deadline in queries:
+        if time.monotonic() >= deadline:
+            results.append(("timeout", None, 0.0))
+            continue
+        algorithm, heuristic, size, final_state, initial_state = key
+        start_time = time.perf_counter()
+        try:
+            path = solver.solve(initial_state, final_state, algorithm, heuristic, size)
+        except Exception as e:
+            results.append(("error", str(e) or type(e).__name__, 0.0))
+            continue
+        seconds = round(time.perf_counter() - start_time, 6)
+        results.append(("done", None if path is None else board.move_string(path, size), seconds))
+    return results
+
+""" Parse Request
+Converts a query message into a job dictionary like batch.parse_job. Raises ValueError for malformed messages
+"""
+def parse_request(message):
+    if not isinstance(message, dict) or not isinstance(message.get("start"), str) or not isinstance(message.get("goal"), str):
+        raise ValueError("Expected a JSON object with 'start' and 'goal' tiles")
+    initial_state, size = batch.parse_tiles(message["start"])
+    final_state, final_size = batch.parse_tiles(message["goal"])
+    if size != final_size:
+        raise ValueError("Start and goal boards have different sizes")
+    algorithm = message.get("algorithm", "astar")
+    if algorithm not in solver.ALGORITHMS:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+    heuristic = message.get("heuristic")
+    if heuristic is not None and heuristic not in greedy.HEURISTICS:
+        raise ValueError(f"Unknown heuristic: {heuristic}")
+    timeout = message.get("timeout")
+    if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0):
+        raise ValueError(f"Invalid timeout: {timeout}")
+    return {
+        "start": message["start"],
+        "goal": message["goal"],
+        "algorithm": algorithm,
+        "heuristic": heuristic,
+        "timeout": timeout,
+        "size": size,
+        "initial_state": initial_state,
+        "final_state": final_state,
+    }
+
+""" Pending Search
+A cache miss waiting for, or running in, a worker. 'waiters' counts the requests still waiting for it: a search left without waiters before being dispatched is dropped, and its deadline is the latest of its waiters'
+"""
+class PendingSearch:
+    def __init__(self, key, deadline):
+        self.key = key
+        self.deadline = deadline
+        self.waiters = 0
+        self.future = asyncio.get_running_loop().create_future()
+
+class SolverDaemon:
+    """ Initialization
+    - workers - number of worker processes (by default one per CPU)
+    - cache_bytes, cache_path - memory budget and optional file of the result cache (see cache.SolverCache); the file is saved when the daemon stops
+    - timeout - default deadline of a query, in seconds (None for no deadline)
+    - sizes - board sizes whose tables are built when the workers start
+    """
+    def __init__(self, workers=None, cache_bytes=64 * 1024 * 1024, cache_path=None, timeout=None, sizes=WARM_SIZES, batch_window=BATCH_WINDOW, max_batch=MAX_BATCH):
+        self.workers = workers or os.cpu_count() or 1
+        self.cache = cache.SolverCache(cache_bytes, cache_path)
+        self.timeout = timeout
+        self.sizes = tuple(sizes)
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.searches = {}
+        self.counters = {"requests": 0, "solved": 0, "timeouts": 0, "cancelled": 0, "coalesced": 0, "batches": 0, "searches": 0}
+
+    """ Serve
+    Starts the worker pool and listens on 'path' until stop() is called (or SIGINT/SIGTERM is received). A stale socket file is replaced
+    """
+    async def serve(self, path=SOCKET_PATH):
+        loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        self.stopped = asyncio.Event()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signal_number, self.stop)
+        if os.path.exists(path):
+            os.unlink(path)
+        executor = ProcessPoolExecutor(max_workers=self.workers, initializer=warm_worker, initargs=(self.sizes,))
+        try:
+            """ Warm Up
+            The first task makes the pool start its workers, so their tables are built before the first query arrives
+            """
+            await loop.run_in_executor(executor, len, ())
+            dispatcher = asyncio.create_task(self.dispatch(executor))
+            server = await asyncio.start_unix_server(self.handle, path, limit=STREAM_LIMIT)
+            async with server:
+                await self.stopped.wait()
+            dispatcher.cancel()
+        finally:
+            """ Shutdown
+            Queued chunks are dropped; the searches already running are waited for
+            """
+            executor.shutdown(cancel_futures=True)
+            for signal_number in (signal.SIGINT, signal.SIGTERM):
+                loop.remove_signal_handler(signal_number)
+            if os.path.exists(path):
+                os.unlink(path)
+            if self.cache.path is not None:
+                self.cache.save()
+
+    def stop(self):
+        self.stopped.set()
+
+    """ Handle
+    Serves one connection. Every query runs in its own task, so slow queries don't hold back the next lines. 'running' holds the tasks of every query of the connection that hasn't been answered yet, with or without an id, and 'tasks' maps the ids of those that have one to their task, for cancellation. Once the client has closed its side, every remaining answer is sent before the connection is closed
+    """
+    async def handle(self, reader, writer):
+        running = set()
+        tasks = {}
+
+        def send(answer):
+            writer.write((json.dumps(answer) + "\n").encode())
+
+        """ Forget
+        Removes a finished query from 'tasks'. A query cancelled before its task started never ran, so it is answered here
+        """
+        def forget(request_id, task):
+            if tasks.get(request_id) is task:
+                del tasks[request_id]
+            if task.cancelled():
+                self.counters["cancelled"] += 1
+                send({"id": request_id, "status": "cancelled"})
+
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    send({"status": "invalid", "error": "Line too long"})
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    send({"status": "invalid", "error": "Malformed JSON"})
+                    continue
+                if isinstance(message, dict) and "cancel" in message:
+                    task = tasks.get(message["cancel"])
+                    if task is not None:
+                        task.cancel()
+                    continue
+                if isinstance(message, dict) and message.get("stats"):
+                    send({"id": message.get("id"), "status": "ok", "cache": self.cache.stats(), "pending": len(self.searches)} | self.counters)
+                    continue
+                request_id = message.get("id") if isinstance(message, dict) else None
+                task = asyncio.create_task(self.answer(request_id, message, send))
+                running.add(task)
+                task.add_done_callback(running.discard)
+                if request_id is not None:
+                    tasks[request_id] = task
+                    task.add_done_callback(lambda done, request_id=request_id: forget(request_id, done))
+                await writer.drain()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+            await writer.drain()
+        except ConnectionError:
+            for task in running:
+                task.cancel()
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    """ Answer
+    Answers one query: invalid and unsolvable queries and cache hits directly, the others once their search is done, their deadline has passed or they are cancelled
+    """
+    async def answer(self, request_id, message, send):
+        self.counters["requests"] += 1
+        try:
+            job = parse_request(message)
+        except ValueError as e:
+            send({"id": request_id, "status": "invalid", "error": str(e)})
+            return
+        answer = {"id": request_id} | {key: job[key] for key in ("start", "goal", "algorithm", "heuristic")}
+        if not board.is_solvable(job["initial_state"], job["final_state"], job["size"]):
+            send(answer | {"status": "unsolvable"})
+            return
+        key = self.cache.key(job["initial_state"], job["final_state"], job["algorithm"], job["heuristic"], job["size"])
+        found, moves = self.cache.lookup(key)
+        if found:
+            send(answer | self.result(moves, 0.0, True))
+            return
+
+        timeout = job["timeout"] if job["timeout"] is not None else self.timeout
+        deadline = time.monotonic() + timeout if timeout is not None else float("inf")
+        search = self.submit(key, deadline)
+        try:
+            status, moves, seconds = await asyncio.wait_for(asyncio.shield(search.future), timeout)
+        except asyncio.TimeoutError:
+            self.counters["timeouts"] += 1
+            send(answer | {"status": "timeout"})
+            return
+        except asyncio.CancelledError:
+            self.counters["cancelled"] += 1
+            send(answer | {"status": "cancelled"})
+            return
+        except Exception as e:
+            send(answer | {"status": "error", "error": str(e)})
+            return
+        finally:
+            search.waiters -= 1
+        if status == "timeout":
+            self.counters["timeouts"] += 1
+            send(answer | {"status": "timeout"})
+        elif status == "error":
+            send(answer | {"status": "error", "error": moves})
+        else:
+            send(answer | self.result(moves, seconds, False))
+
+    def result(self, moves, seconds, cached):
+        if moves is None:
+            return {"status": "no solution", "seconds": seconds, "cached": cached}
+        self.counters["solved"] += 1
+        return {"status": "solved", "moves": len(moves), "solution": moves, "seconds": seconds, "cached": cached}
+
+    """ Submit
+    Returns the pending search of a key, creating and queueing it when no identical query is waiting
+    """
+    def submit(self, key, deadline):
+        search = self.searches.get(key)
+        if search is None:
+            search = self.searches[key] = PendingSearch(key, deadline)
+            self.queue.put_nowait(search)
+        else:
+            self.counters["coalesced"] += 1
+            search.deadline = max(search.deadline, deadline)
+        search.waiters += 1
+        return search
+
+    """ Dispatch
+    Batching loop: waits for a search, collects the ones that arrive within the batch window (up to max_batch), drops those left without waiters, and sends the rest to the workers in up to CHUNKS_PER_WORKER chunks per worker. The pool queues chunks while every worker is busy, and the workers skip the queries whose deadline passes meanwhile
+    """
+    async def dispatch(self, executor):
+        loop = asyncio.get_running_loop()
+        while True:
+            searches = [await self.queue.get()]
+            await asyncio.sleep(self.batch_window)
+            while len(searches) < self.max_batch and not self.queue.empty():
+                searches.append(self.queue.get_nowait())
+            for search in searches:
+                if not search.waiters:
+                    del self.searches[search.key]
+            searches = [search for search in searches if search.waiters]
+            if not searches:
+                continue
+            self.counters["batches"] += 1
+            self.counters["searches"] += len(searches)
+            chunks = min(CHUNKS_PER_WORKER * self.workers, len(searches))
+            for index in range(chunks):
+                chunk = searches[index::chunks]
+                future = loop.run_in_executor(executor, solve_queries, [(search.key, search.deadline) for search in chunk])
+                future.add_done_callback(lambda future, chunk=chunk: self.resolve(chunk, future))
+
+    """ Resolve
+    Stores the results of a chunk in the cache and wakes up the requests waiting for them
+    """
+    def resolve(self, chunk, future):
+        for search in chunk:
+            del self.searches[search.key]
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            for search in chunk:
+                if search.waiters:
+                    search.future.set_exception(future.exception())
+            return
+        for search, (status, moves, seconds) in zip(chunk, future.result()):
+            if status == "done":
+                self.cache.store(search.key, moves)
+            search.future.set_result((status, moves, seconds))
+
+""" Client
+Sends the messages (dictionaries) to a running daemon and yields its answers as they arrive, until every query has been answered
+"""
+def client(messages, path=SOCKET_PATH):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(path)
+        connection.sendall("".join(json.dumps(message) + "\n" for message in messages).encode())
+        connection.shutdown(socket.SHUT_WR)
+        with connection.makefile("r") as answers:
+            for line in answers:
+                yield json.loads(line)
+
+""" Command Line
+python daemon.py [--socket PATH] [--workers N] [--timeout SECONDS] [--cache-file FILE] [--cache-mb N] [--sizes N ...]
+python daemon.py --client [--socket PATH] < messages
+The first form runs the daemon until it is interrupted; the second sends the JSON lines read from stdin to a running daemon and prints the answers
+"""
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Solver daemon on a Unix socket")
+    parser.add_argument("--socket", default=SOCKET_PATH, help=f"socket path (default: {SOCKET_PATH})")
+    parser.add_argument("--client", action="store_true", help="send stdin to a running daemon instead of starting one")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("--timeout", type=float, default=None, help="default deadline of a query, in seconds")
+    parser.add_argument("--cache-file", help="file the result cache is loaded from and saved to")
+    parser.add_argument("--cache-mb", type=int, default=64, help="memory budget of the result cache, in MB")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(WARM_SIZES), help="board sizes whose tables are built at startup")
+    options = parser.parse_args(arguments)
+
+    if options.client:
+        messages = [json.loads(line) for line in sys.stdin if line.strip()]
+        for answer in client(messages, options.socket):
+            print(json.dumps(answer), flush=True)
+        return 0
+    daemon = SolverDaemon(options.workers, options.cache_mb * 1024 * 1024, options.cache_file, options.timeout, options.sizes)
+    asyncio.run(daemon.serve(options.socket))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
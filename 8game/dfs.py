@@ -1,120 +1,168 @@
+from board import SIZE, successor_function, reconstruct_path, packed_bits
+from array import array
+from stats import tree_depth
+from compact import compact_store, STORAGES
+
 """ DFS Algorithm
 Implementation of the Depth-first Algorithm function, having as parameters the initial_state and final_state taken as inputs in the main function, on index.py
+Both states are packed boards (see board.py) and the returned path is a list of packed boards
+A SearchStats object passed as 'stats' is filled in with the search statistics (see stats.py)
+'storage' selects how visited states are kept: 'dict' (a set and a dictionary) or 'compact' (a bitset and 2-bit move codes on 3x3 and smaller boards, a dictionary of move codes on larger ones, see compact.py)
 """
-def dfs_algorithm(initial_state, final_state):
+def dfs_algorithm(initial_state, final_state, size=SIZE, stats=None, storage="dict"):
     """ Variables/Data Structures Initialization
     - stack - represents the stack used in DFS to hold nodes that are yet to be explored
     - explored_nodes - is a set that stores the states that have already been visited to prevent revisiting
     - prev - is a dictionary mapping each state to the state that led to it, helping to reconstruct the path once the final state is found
-    - max_depth
+    - successors - the shared successor generator for this board size (see board.py)
+    With compact storage, one compact store serves as both 'explored_nodes' and 'prev', and the stack is an array of 64-bit integers when states fit in them (see board.packed_bits)
     """
-    stack = [initial_state]
-    explored_nodes = set()
-    prev = {} 
-    max_depth = 0
+    if storage not in STORAGES:
+        raise ValueError(f"Unknown storage: {storage}")
+    if storage == "compact":
+        explored_nodes = prev = compact_store(initial_state, size)
+        stack = array("Q", [initial_state]) if packed_bits(size) <= 64 else [initial_state]
+    else:
+        stack = [initial_state]
+        explored_nodes = {initial_state}
+        prev = {}
+    successors = successor_function(size)
+    if stats is not None:
+        successors = stats.timed(successors, "expansion_seconds")
+        if storage == "dict":
+            explored_nodes = stats.timed_set(explored_nodes)
+            prev = stats.timed_dict(prev)
 
     """ DFS Loop
     This loop will run as long as there are states in the stack to explore
     """
     while stack:
         """ State exploration
-        board is the current state taken from the top of the stack. It's converted to a tuple of tuples to store in "explored_nodes"
+        board is the current state taken from the top of the stack. Packed boards are ints, so they are stored as they are in "explored_nodes"
         """
         board = stack.pop()
-        explored_nodes.add(tuple(map(tuple, board)))
         """ Final State Check
         If the current state is the goal state, the function reconstructs the path from the initial state to the final state using the 'prev' dictionary and returns it
         """
         if board == final_state:
-            return reconstruct_path(board, prev)
+            path = reconstruct_path(board, prev)
+            return path if stats is None else stats.finish(path, len(explored_nodes), tree_depth(prev))
         """ Neighbor Exploration
         For each valid move (or 'neighbor') from the current state
         """
-        for neighbor in neighbors(board):
+        children = successors(board)
+        if stats is not None:
+            stats.expand(board, len(stack) + 1, len(children))
+        for move, neighbor in children:
             """ Exploration Check
             It checks if the neighbor hasn't been explored yet
             """
-            if tuple(map(tuple, neighbor)) not in explored_nodes:
+            if neighbor not in explored_nodes:
                 """ Neighbor Addition
                 The neighbor is added to the stack for exploration, marked as explored and current state is recorded as the neighbor's predecessor
                 """
                 stack.append(neighbor)
-                explored_nodes.add(tuple(map(tuple, neighbor)))
-                prev[tuple(map(tuple, neighbor))] = tuple(map(tuple, board))
-                max_depth = max(max_depth, len(neighbor))
-    
+                explored_nodes.add(neighbor)
+                prev[neighbor] = board
+
     """Return None if there's no solution"""
-    return None
+    return None if stats is None else stats.finish(None, len(explored_nodes), tree_depth(prev))
 
-""" Neighbors function
-Used to find all the possible states that can be reached from the current state of the 8-puzzle with a single tile move.
-It taked as parameter the current layout state of the game
+""" Depth Limit
+Default depth cap of the bounded searches: the largest distance between two 3x3 boards, so on 3x3 every solvable puzzle is found within it. Larger boards need a larger cap (80 covers every 4x4 puzzle)
 """
-def neighbors(state):
-    """ Find the Empty Tile
-    It finds the coordinates (row, column) of the empty space
-    enumerate(state) gives us a pair of (index, row), where 'index' is the row number and 'row' is the list representing the row in the puzzle
-    row.index(0) finds the column index of the empty space('0') in the row
-    This information is used to determine which moves are possible
-    """
-    empty_tile_position = [(i, row.index(0)) for i, row in enumerate(state) if 0 in row][0]
-    
-    neighbors = []
+DEFAULT_DEPTH_LIMIT = 31
 
-    """ Possible Moves (up, down, left, right)
-    This list defines the directions in which the empty tile can move: down, up, right, and left, respectively.
-    Each move is a tuple representing the change in the row and column of the empty space if that move is made.
-    """
-    moves = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+""" Transposition Table Size
+Default bound on the number of states in the transposition table of the bounded searches (a few MB). None or 0 disables the table, so memory only grows with the depth
+"""
+DEFAULT_TABLE_SIZE = 1 << 16
 
-    """For each move possible"""
-    for move in moves:
-        new_row = empty_tile_position[0] + move[0]
-        new_col = empty_tile_position[1] + move[1]
+""" Bounded DFS
+Depth-first search from initial_state that never goes deeper than 'limit' moves. It keeps only the current path and, for every state on it, the children not tried yet, so memory grows with the depth instead of with the number of states visited. Returns (path, cutoff): the first path found (or None) and whether some state was cut off by the limit.
+The move that would undo the last move is never generated and states on the current path are skipped. With a transposition table ('table', a dictionary of at most 'table_size' entries), a state is also skipped when it was already reached with as few moves, since everything within the remaining depth was searched from it then. Once the table is full, only the depths already in it are lowered
+"""
+def bounded_dfs(initial_state, final_state, successors, limit, table=None, table_size=0, stats=None):
+    path = [initial_state]
+    on_path = {initial_state}
+    if initial_state == final_state:
+        return path, False
+    if table is not None:
+        table[initial_state] = 0
+    if limit == 0:
+        return None, True
+    pending = [successors(initial_state)]
+    if stats is not None:
+        stats.expand(initial_state, 1, len(pending[-1]))
+    cutoff = False
 
-        """ Validate Move
-        This checks if the move is valid by ensuring the new position of the empty space is still within the bounds of the grid
+    """ DFS Loop
+    pending[-1] holds the children of the last state of 'path' that are still to be tried; when it runs out, the search backtracks
+    """
+    while pending:
+        children = pending[-1]
+        if not children:
+            pending.pop()
+            on_path.discard(path.pop())
+            continue
+        move, neighbor = children.pop()
+        depth = len(path)
+        """ Pruning
+        Cycles through the current path, and states the transposition table has seen at the same or a smaller depth
         """
-        if 0 <= new_row < len(state) and 0 <= new_col < len(state[0]):
-            """ Create New State 
-            A new state is created as a copy of the current state. The : is used to create a shallow copy of each row so that we don't alter the original state
-            """
-            neighbor_state = [row[:] for row in state]
-            """ Execute Move
-            The value at the new position of the empty space (which will be a numbered tile after the move) is moved to where the empty space was
-            The new position of the empty space is set to '0'
-            """
-            neighbor_state[empty_tile_position[0]][empty_tile_position[1]] = neighbor_state[new_row][new_col]
-            neighbor_state[new_row][new_col] = 0
-            """ Record Neighbor State
-            This modified 'neighbor_state' is added to the list 'neighbors', signifying it's a valid state reachable from the current state
-            """
-            neighbors.append(neighbor_state)
+        if neighbor in on_path:
+            if stats is not None:
+                stats.duplicates += 1
+            continue
+        if table is not None:
+            seen = table.get(neighbor)
+            if seen is not None and seen <= depth:
+                if stats is not None:
+                    stats.duplicates += 1
+                continue
+            if seen is not None or len(table) < table_size:
+                table[neighbor] = depth
+        path.append(neighbor)
+        on_path.add(neighbor)
+        if stats is not None and depth > stats.max_depth:
+            stats.max_depth = depth
+        if neighbor == final_state:
+            return path, cutoff
+        """ Depth Cap
+        States at the cap are not expanded; they only get an empty list of children so that the search backtracks from them
+        """
+        if depth < limit:
+            pending.append(successors(neighbor, move))
+            if stats is not None:
+                stats.expand(neighbor, len(path), len(pending[-1]))
+        else:
+            cutoff = True
+            pending.append([])
+    return None, cutoff
 
-    """ Return Neighbors
-    The function returns the list 'neighbors', which contains all the new states that can be reached with one move from the current state
-    """
-    return neighbors
+""" Depth-Limited DFS
+Depth-first search that returns the first solution with at most 'limit' moves, or None if there is none. Parameters and path format as dfs_algorithm.
+'table_size' bounds the transposition table (see bounded_dfs), which trades memory for fewer revisits
+"""
+def depth_limited_search(initial_state, final_state, size=SIZE, limit=DEFAULT_DEPTH_LIMIT, table_size=DEFAULT_TABLE_SIZE, stats=None):
+    successors = successor_function(size)
+    if stats is not None:
+        successors = stats.timed(successors, "expansion_seconds")
+    table = {} if table_size else None
+    path, cutoff = bounded_dfs(initial_state, final_state, successors, limit, table, table_size, stats)
+    return path if stats is None else stats.finish(path)
 
-""" Reconstruct Path
-Used to traceback the path from the goal state to the initial state once a solution has been found using the DFS algorithm. It works by utilizing the information stored in the 'prev' dictionary, which holds the predecessors of each state visiting during the search
-It takes two parameters (state and prev)
+""" Iterative Deepening DFS
+Repeats the depth-limited search with limits 0, 1, 2, ... up to 'max_depth', so the first solution found is a shortest one, with the memory of a depth-first search. Each iteration starts with an empty transposition table.
+The loop also stops when an iteration cut nothing off, since then every reachable state was searched
 """
-def reconstruct_path(state, prev):
-    path = []
-    """ Tracing Back the Path 
-    The function enters a loop that will continue until there is no previous state to go back to, which happens when the initial state is reached and its 'prev' entry is 'None'
-    """
-    while state is not None:
-        """ Append the Current State to the Path
-        The current state is added to the path list. In the first iteration, this is the goal state, and in subsequent iterations, it will be each predecessor state leading back to the initial state.
-        """
-        path.append(state)
-        """ Move to the Previous State 
-        The current state is updated to its predecessor state. This is done by looking up the current state in the prev dictionary.
-        Since lists are not hashable and cannot be used as keys in a dictionary, the state, which is a list of lists, is converted to a tuple of tuples. Tuples are hashable and can be used as keys.
-        prev.get() is a safe way of retrieving the predecessor state from the dictionary; if the key doesn't exist, it returns None. (and the while loop ends)
-        """
-        state = prev.get(tuple(map(tuple, state)))
-    """ Return the Reversed Path """
-    return path[::-1]
\ No newline at end of file
+def iterative_deepening_search(initial_state, final_state, size=SIZE, max_depth=DEFAULT_DEPTH_LIMIT, table_size=DEFAULT_TABLE_SIZE, stats=None):
+    successors = successor_function(size)
+    if stats is not None:
+        successors = stats.timed(successors, "expansion_seconds")
+    for limit in range(max_depth + 1):
+        table = {} if table_size else None
+        path, cutoff = bounded_dfs(initial_state, final_state, successors, limit, table, table_size, stats)
+        if path is not None or not cutoff:
+            return path if stats is None else stats.finish(path)
+    return None if stats is None else stats.finish(None)
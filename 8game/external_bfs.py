@@ -0,0 +1,237 @@
+import argparse
+import heapq
+import json
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import time
+from board import SIZE, packed_bits, successor_function, from_tiles, canonical_goal
+
+""" External-Memory BFS
+Breadth-first search for state spaces that don't fit in RAM. Each depth layer is a file of packed states (see board.py), sorted and without duplicates, read back through mmap:
+- layer_NNNN.bin - the states at depth NNNN, as fixed-width big-endian records, so byte order and numeric order agree
+- runs/ - sorted runs of the next layer's children, each at most 'chunk_size' states, written while the current layer is expanded
+- checkpoint.json - the initial state, board size and the number of states of every finished layer
+The next layer is the merge of the runs, without duplicates and without the states of the current and previous layers (a move can only go one layer up or down, see vector_bfs.py), so only one run of children is held in memory at a time.
+A layer file is written under a temporary name and renamed once complete, and the checkpoint is only updated after that, so an interrupted search resumes at the first unfinished layer
+"""
+CHUNK_SIZE = 1 << 20
+CHECKPOINT = "checkpoint.json"
+
+""" Record Width
+Number of bytes of a packed state (see board.packed_bits): 5 for 3x3 and 8 for 4x4
+"""
+def record_width(size=SIZE):
+    return (packed_bits(size) + 7) // 8
+
+def layer_path(directory, depth):
+    return os.path.join(directory, f"layer_{depth:04d}.bin")
+
+""" Write States
+Writes a sorted iterable of states to 'path' through a temporary file, and returns the number of states written
+"""
+def write_states(path, states, width):
+    count = 0
+    with open(path + ".tmp", "wb", buffering=1 << 20) as f:
+        for state in states:
+            f.write(state.to_bytes(width, "big"))
+            count += 1
+    os.replace(path + ".tmp", path)
+    return count
+
+""" Read States
+Generator of the states stored in a layer or run file, in file order. The file is memory-mapped, so it is paged in as it is read
+"""
+def read_states(path, width):
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for offset in range(0, len(data), width):
+            yield int.from_bytes(data[offset:offset + width], "big")
+
+""" Contains
+Binary search for 'state' in a sorted layer file
+"""
+def contains(path, state, width):
+    size = os.path.getsize(path)
+    if size == 0:
+        return False
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        low, high = 0, size // width
+        while low < high:
+            middle = (low + high) // 2
+            value = int.from_bytes(data[middle * width:(middle + 1) * width], "big")
+            if value == state:
+                return True
+            if value < state:
+                low = middle + 1
+            else:
+                high = middle
+    return False
+
+""" Unique Excluding
+Merges sorted runs into one sorted stream without duplicates, leaving out every state of the sorted streams in 'excluded' (the current and previous layers)
+"""
+def unique_excluding(runs, excluded):
+    excluded = [iter(stream) for stream in excluded]
+    heads = [next(stream, None) for stream in excluded]
+    previous = None
+    for state in heapq.merge(*runs):
+        if state == previous:
+            continue
+        previous = state
+        found = False
+        for index, stream in enumerate(excluded):
+            while heads[index] is not None and heads[index] < state:
+                heads[index] = next(stream, None)
+            if heads[index] == state:
+                found = True
+        if not found:
+            yield state
+
+""" Checkpoint
+The checkpoint is rewritten atomically after every layer
+"""
+def load_checkpoint(directory):
+    path = os.path.join(directory, CHECKPOINT)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def save_checkpoint(directory, checkpoint):
+    path = os.path.join(directory, CHECKPOINT)
+    with open(path + ".tmp", "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(path + ".tmp", path)
+
+def write_run(runs, runs_directory, buffer, width):
+    path = os.path.join(runs_directory, f"run_{len(runs):04d}.bin")
+    write_states(path, sorted(set(buffer)), width)
+    runs.append(path)
+
+""" Expand Layer
+Writes the layer at depth + 1 from the layers at depth and depth - 1, and returns its number of states
+"""
+def expand_layer(directory, depth, size, width, successors, chunk_size):
+    runs_directory = os.path.join(directory, "runs")
+    shutil.rmtree(runs_directory, ignore_errors=True)
+    os.makedirs(runs_directory)
+    """ Sorted Runs
+    Children are collected until 'chunk_size' of them are in memory, then sorted, deduplicated and written as a run
+    """
+    runs = []
+    buffer = []
+    for state in read_states(layer_path(directory, depth), width):
+        for move, neighbor in successors(state):
+            buffer.append(neighbor)
+        if len(buffer) >= chunk_size:
+            write_run(runs, runs_directory, buffer, width)
+            buffer = []
+    if buffer:
+        write_run(runs, runs_directory, buffer, width)
+    del buffer
+
+    excluded = [read_states(layer_path(directory, depth), width)]
+    if depth > 0:
+        excluded.append(read_states(layer_path(directory, depth - 1), width))
+    count = write_states(layer_path(directory, depth + 1), unique_excluding([read_states(run, width) for run in runs], excluded), width)
+    shutil.rmtree(runs_directory)
+    return count
+
+""" Explore
+Runs the external BFS from initial_state in 'directory' and returns the number of states of every layer. It stops after the layer that contains 'final_state', when one is given, or when a layer is empty.
+With 'resume', an existing checkpoint for the same initial state and size is continued; otherwise the directory is started over. 'progress', when given, is called after every layer with (depth, states in the layer, seconds spent on it)
+"""
+def explore(initial_state, directory, size=SIZE, final_state=None, chunk_size=CHUNK_SIZE, resume=True, progress=None):
+    width = record_width(size)
+    successors = successor_function(size)
+    os.makedirs(directory, exist_ok=True)
+    checkpoint = load_checkpoint(directory) if resume else None
+    if checkpoint is None or checkpoint["initial_state"] != initial_state or checkpoint["size"] != size:
+        checkpoint = {"initial_state": initial_state, "size": size, "layers": [write_states(layer_path(directory, 0), [initial_state], width)]}
+        save_checkpoint(directory, checkpoint)
+    layers = checkpoint["layers"]
+    if final_state is not None:
+        for depth in range(len(layers)):
+            if contains(layer_path(directory, depth), final_state, width):
+                return layers[:depth + 1]
+
+    while layers[-1] and not (final_state is not None and contains(layer_path(directory, len(layers) - 1), final_state, width)):
+        start = time.perf_counter()
+        count = expand_layer(directory, len(layers) - 1, size, width, successors, chunk_size)
+        layers.append(count)
+        save_checkpoint(directory, checkpoint)
+        if progress:
+            progress(len(layers) - 1, count, time.perf_counter() - start)
+    return layers
+
+""" Layer States
+Generator of the states at the given depth of a finished search, e.g. to fill a distance table
+"""
+def layer_states(directory, depth, size=SIZE):
+    return read_states(layer_path(directory, depth), record_width(size))
+
+""" Layer Path
+Rebuilds a shortest path to 'final_state', found at the last layer, by looking for a neighbor in each previous layer file
+"""
+def reconstruct_layer_path(directory, final_state, depth, size, width):
+    successors = successor_function(size)
+    path = [final_state]
+    for layer in range(depth - 1, -1, -1):
+        for move, neighbor in successors(path[-1]):
+            if contains(layer_path(directory, layer), neighbor, width):
+                path.append(neighbor)
+                break
+    return path[::-1]
+
+""" External BFS Algorithm
+Same parameters and path format as bfs.bfs_algorithm. The layers are kept in 'directory' (a temporary directory, removed afterwards, when None).
+With 'stats', every state of a layer counts as expanded (see stats.py)
+"""
+def external_bfs(initial_state, final_state, size=SIZE, directory=None, chunk_size=CHUNK_SIZE, stats=None):
+    temporary = directory is None
+    if temporary:
+        directory = tempfile.mkdtemp(prefix="external_bfs_")
+    try:
+        layers = explore(initial_state, directory, size, final_state, chunk_size)
+        path = None
+        if layers[-1]:
+            path = reconstruct_layer_path(directory, final_state, len(layers) - 1, size, record_width(size))
+        if stats is not None:
+            stats.nodes_expanded += sum(layers[:-1])
+            stats.peak_frontier = max(stats.peak_frontier, max(layers))
+            return stats.finish(path, max_depth=len(layers) - 1)
+        return path
+    finally:
+        if temporary:
+            shutil.rmtree(directory, ignore_errors=True)
+
+""" Command Line
+python external_bfs.py DIRECTORY [--size N] [--start TILES] [--chunk-size N] [--restart]
+Explores every state reachable from the start (by default the canonical goal) and prints the size of every layer as it is finished. Interrupted runs continue from their last finished layer unless --restart is given
+"""
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="External-memory breadth-first search")
+    parser.add_argument("directory")
+    parser.add_argument("--size", type=int, default=SIZE)
+    parser.add_argument("--start", help="comma separated start tiles (default: the canonical goal)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="children sorted in memory at once")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    options = parser.parse_args(arguments)
+    if options.start:
+        initial_state = from_tiles([int(tile) for tile in options.start.split(",")], options.size)
+    else:
+        initial_state = canonical_goal(size=options.size)
+
+    def report(depth, count, seconds):
+        print(f"depth {depth}: {count} states ({seconds:.2f} s)", file=sys.stderr)
+
+    layers = explore(initial_state, options.directory, options.size, chunk_size=options.chunk_size, resume=not options.restart, progress=report)
+    print(json.dumps({"states": sum(layers), "depth": len(layers) - 2 if not layers[-1] else len(layers) - 1, "layers": layers}))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,170 +1,349 @@
 
-""" heapq
-The heapq module in Python is part of the standard library and provides an implementation of the heap queue algorithm, also known as the priority queue algorithm
+""" Bucket Queue
+Heuristic values are small non-negative integers, so the frontier is a bucket queue (see bucket_queue.py) with O(1) push and pop instead of a binary heap
 """
-import heapq
+from bucket_queue import BucketQueue
+from stats import tree_depth
+from compact import compact_store, STORAGES
+from board import SIZE, successor_function, reconstruct_path, to_tiles, tile_bits, blank_function
+from pattern_database import pattern_database_heuristic
 
-""" Greedy Best-First Algorithm 
+""" Greedy Best-First Algorithm
 Implementation of the Greedy Best-First Algorithm function, having as parameters the initial_state, final_state and heuristic taken as inputs in the main function, on index.py
+Both states are packed boards (see board.py) and the returned path is a list of packed boards
+'order' is the tie-breaking order among states with the same heuristic value: 'lifo' (most recently generated first) or 'fifo'
+A SearchStats object passed as 'stats' is filled in with the search statistics (see stats.py)
+'storage' selects how visited states are kept: 'dict' (a set and a dictionary) or 'compact' (a bitset and 2-bit move codes on 3x3 and smaller boards, a dictionary of move codes on larger ones, see compact.py)
 """
-def greedy_best_first_search(initial_state, final_state, heuristic):
+def greedy_best_first_search(initial_state, final_state, heuristic, size=SIZE, order="lifo", stats=None, storage="dict"):
     """ Heuristic Selection
-    Selects the heuristic function based on the 'heuristic' parameter. If manhattan is chosen, it uses the manhattan_distance function. Otherwise, it uses hamming_distance
-    It is mandatory in the main function, on index.py, to chose either.
+    Builds the heuristic selected by the 'heuristic' parameter for this final state (see make_heuristic)
+    It is mandatory in the main function, on index.py, to chose one.
     """
-    heuristic_function = manhattan_distance if heuristic == 'manhattan' else hamming_distance
+    evaluate, update = make_heuristic(heuristic, final_state, size)
     """ Variables/Data Structures Initialization
-    - frontier - empty list named that will be used as a priority queue to store states to be explored, along with their heuristic values
-    - heapq.heappush(...) - adds the initial state to the frontier with a heuristic value of 0, marking the starting point of the search
+    - frontier - priority queue that will store the states to be explored, by heuristic value
+    - frontier.push(...) - adds the initial state to the frontier with its heuristic value, marking the starting point of the search
     - explored_nodes - is a set that stores the states that have already been visited to prevent revisiting
     - prev - is a dictionary mapping each state to the state that led to it, helping to reconstruct the path once the final state is found
-    - max_depth
+    - successors - the shared successor generator for this board size (see board.py)
+    With compact storage, one compact store serves as both 'explored_nodes' and 'prev'
     """
-    frontier = [] 
-    heapq.heappush(frontier, (0, initial_state))
-    explored_nodes = set() 
-    prev = {tuple(map(tuple, initial_state)): None}
+    if storage not in STORAGES:
+        raise ValueError(f"Unknown storage: {storage}")
+    frontier = BucketQueue(order)
+    frontier.push(evaluate(initial_state), initial_state)
+    if storage == "compact":
+        explored_nodes = prev = compact_store(initial_state, size)
+    else:
+        explored_nodes = {initial_state}
+        prev = {initial_state: None}
+    successors = successor_function(size)
+    if stats is not None:
+        evaluate = stats.timed(evaluate, "heuristic_seconds")
+        update = stats.timed(update, "heuristic_seconds")
+        successors = stats.timed(successors, "expansion_seconds")
+        if storage == "dict":
+            explored_nodes = stats.timed_set(explored_nodes)
+            prev = stats.timed_dict(prev)
 
-    """ Greddy BF Loop 
+    """ Greddy BF Loop
     The loop will continue as long as there are states in the 'frontier' to be explored
     """
     while frontier:
-        """ Lowest Heuristic Value 
-        Removes and returns the state from the frontier with the lowest heuristic value. 
+        """ Lowest Heuristic Value
+        Removes and returns the state from the frontier with the lowest heuristic value.
         This is considered the current state for this iteration of the loop
         """
-        current_heuristic, board = heapq.heappop(frontier)
+        current_heuristic, board = frontier.pop()
         """ Final State Check
         If the current state is the goal state, the function reconstructs the path from the initial state to the final state using the 'prev' dictionary and returns it
         """
         if board == final_state:
-            return reconstruct_path(board, prev)
-
-        """ Mark as Explored
-        Adds the current state to the 'explored_nodes' set to mark it as explored
-        """
-        explored_nodes.add(tuple(map(tuple, board)))
+            path = reconstruct_path(board, prev)
+            return path if stats is None else stats.finish(path, len(explored_nodes), tree_depth(prev))
 
         """ Neighbor Exploration
         For each valid move (or 'neighbor') from the current state
         """
-        for neighbor in neighbors(board):
+        children = successors(board)
+        if stats is not None:
+            stats.expand(board, len(frontier) + 1, len(children))
+        for move, neighbor in children:
             """ Exploration Check
             It checks if the neighbor hasn't been explored yet
             """
-            if tuple(map(tuple, neighbor)) not in explored_nodes:
+            if neighbor not in explored_nodes:
                 """ Neighbor Addition
                 The neighbor is added for exploration, marked as explored and current state is recorded as the neighbor's predecessor
-                Adds the neighbor to the frontier along with its heuristic value calculated by the selected heuristic function. This value estimates the cost or distance from the neighbor to the goal state.
+                Adds the neighbor to the frontier along with its heuristic value, updated from the current state's value by the selected heuristic. This value estimates the cost or distance from the neighbor to the goal state.
                 """
-                explored_nodes.add(tuple(map(tuple, neighbor)))
-                prev[tuple(map(tuple, neighbor))] = tuple(map(tuple, board)) 
-                heapq.heappush(frontier, (heuristic_function(neighbor, final_state), neighbor))
+                explored_nodes.add(neighbor)
+                prev[neighbor] = board
+                frontier.push(update(current_heuristic, board, neighbor), neighbor)
+
+    return None if stats is None else stats.finish(None, len(explored_nodes), tree_depth(prev))
+
+""" Heuristic Layer
+A heuristic is built once per search for a given final state, with make_heuristic(name, final_state, size), which returns two functions:
+- evaluate(state) - the full heuristic value of a state
+- update(value, parent, child) - the value of 'child', given the value of its 'parent'. A move only displaces one tile, so manhattan and hamming values are updated from that tile alone, and linear conflict only recounts the rows or columns the tile left and entered
+Both use tables precomputed from the final state (goal position of every tile), instead of searching the final state for each tile
+"""
+
+""" Goal Positions
+Returns a list mapping each tile to its position in the final state
+"""
+def goal_positions(final_state, size=SIZE):
+    positions = [0] * (size * size)
+    for position, tile in enumerate(to_tiles(final_state, size)):
+        positions[tile] = position
+    return positions
+
+""" Manhattan Table
+table[tile][position] is the Manhattan distance from 'position' to the tile's goal position (0 for the empty tile)
+"""
+def manhattan_table(final_state, size=SIZE):
+    table = []
+    for tile, goal in enumerate(goal_positions(final_state, size)):
+        goal_i, goal_j = divmod(goal, size)
+        table.append([0 if tile == 0 else abs(goal_i - i) + abs(goal_j - j) for i in range(size) for j in range(size)])
+    return table
+
+""" Hamming Table
+table[tile][position] is 1 if 'position' is not the tile's goal position (0 for the empty tile)
+"""
+def hamming_table(final_state, size=SIZE):
+    return [[0 if tile == 0 or goal == position else 1 for position in range(size * size)] for tile, goal in enumerate(goal_positions(final_state, size))]
 
-    return None 
+""" Table Heuristic
+Builds evaluate/update for heuristics that are a sum over tiles of table[tile][position]
+"""
+def table_heuristic(table, size=SIZE):
+    bits = tile_bits(size)
+    mask = (1 << bits) - 1
+    blank = blank_function(size)
+
+    def evaluate(state):
+        return sum(table[(state >> (position * bits)) & mask][position] for position in range(size * size))
+
+    """ Update
+    The tile that moved is the one now where the empty tile was in the parent; it went from the child's blank position to the parent's blank position
+    """
+    def update(value, parent, child):
+        source = blank(child)
+        target = blank(parent)
+        row = table[(child >> (target * bits)) & mask]
+        return value + row[target] - row[source]
+    return evaluate, update
 
 """ Manhattan Distance
 Calculates the total Manhattan distance between the current state and the goal state for all tiles except the empty tile (0). The Manhattan distance between two points is the sum of the absolute differences of their Cartesian coordinates - in this case, the row and column indices of the tiles.
-It takes the current state and the final_state as parameters
-"""
-def manhattan_distance(state, final_state):
-    distance = 0
-    """ Distance Calculation
-    These nested for loops iterate over every tile in the 'state' matrix. i and j are the row and column indices
-    It then checks if the current tile is not the empty tile. If it is, it is not included for calculation
-    Finds the target position (goal_i and goal_j) of the current tile in the final state. It does this by iterating over every tile in the final_state until it finds a tile matching the current tile's value. The next function returns the first matching coordinate.
-    """
-    for i in range(len(state)):
-        for j in range(len(state[i])):
-            if state[i][j] != 0: 
-                goal_i, goal_j = next((x, y) for x, row in enumerate(final_state) for y, val in enumerate(row) if val == state[i][j])
-                distance += abs(goal_i - i) + abs(goal_j - j)
-    return distance
+It takes the current state and the final_state (both packed boards) as parameters. Searches use make_heuristic instead, which builds the table once
+"""
+def manhattan_distance(state, final_state, size=SIZE):
+    return table_heuristic(manhattan_table(final_state, size), size)[0](state)
 
 """ Hamming Distance
 Calculates the number of tiles in the wrong position when comparing the current state to the goal state, excluding the empty tile
-It takes the current state and the final_state as parameters
-"""
-def hamming_distance(state, final_state):
-    distance = 0
-    """ Distance Calculation
-    These nested for loops iterate over every tile in the 'state' matrix. i and j are the row and column indices
-    It then checks two conditions for each tile: that it is not the empty tile, and that its value does not match the corresponding tile's value in the final_state. This identifies tiles that are in the wrong position.
-    Increments distance by 1 for each tile found to be in the wrong position.
-    """
-    for i in range(len(state)):
-        for j in range(len(state[i])):
-            if state[i][j] != 0 and state[i][j] != final_state[i][j]:
-                distance += 1
-    return distance
-
-def neighbors(state):
-    """ Find the Empty Tile
-    It finds the coordinates (row, column) of the empty space
-    enumerate(state) gives us a pair of (index, row), where 'index' is the row number and 'row' is the list representing the row in the puzzle
-    row.index(0) finds the column index of the empty space('0') in the row
-    This information is used to determine which moves are possible
+It takes the current state and the final_state (both packed boards) as parameters. Searches use make_heuristic instead, which builds the table once
+"""
+def hamming_distance(state, final_state, size=SIZE):
+    return table_heuristic(hamming_table(final_state, size), size)[0](state)
+
+""" Line Conflicts
+Two tiles are in linear conflict when they are in the same row (or column), both have their goal in that line, and they are in the reverse order. At least one of them has to leave the line and come back, which costs 2 moves the Manhattan distance doesn't count.
+Given the goal indices (within the line) of the tiles that belong to the line, in their current order, it returns 2 * (number of tiles that have to leave the line), i.e. 2 * (count - longest increasing subsequence)
+"""
+def line_conflicts(goal_indices):
+    if len(goal_indices) < 2:
+        return 0
+    longest = []
+    for i, goal_index in enumerate(goal_indices):
+        longest.append(1 + max((longest[j] for j in range(i) if goal_indices[j] < goal_index), default=0))
+    return 2 * (len(goal_indices) - max(longest))
+
+""" Linear Conflict Heuristic
+Manhattan distance plus the line conflicts of every row and column. It is admissible and always at least as large as the Manhattan distance
+"""
+def linear_conflict_heuristic(final_state, size=SIZE):
+    bits = tile_bits(size)
+    mask = (1 << bits) - 1
+    line_mask = (1 << (size * bits)) - 1
+    blank = blank_function(size)
+    manhattan_evaluate, manhattan_update = table_heuristic(manhattan_table(final_state, size), size)
+    goal_row = [goal // size for goal in goal_positions(final_state, size)]
+    goal_col = [goal % size for goal in goal_positions(final_state, size)]
+    """ Conflict Tables
+    row_tables[row] maps the bits of a row (its tiles in order, packed like a board) to the row's line conflicts, and col_tables[col] the same for a column's tiles packed top to bottom. They are filled as lines are met, so each line content is only analyzed once per search
     """
-    empty_tile_position = [(i, row.index(0)) for i, row in enumerate(state) if 0 in row][0]
-    
-    neighbors = []
+    row_tables = [{} for line in range(size)]
+    col_tables = [{} for line in range(size)]
+
+    def row_conflicts(state, row):
+        key = (state >> (row * size * bits)) & line_mask
+        value = row_tables[row].get(key)
+        if value is None:
+            tiles = [(key >> (col * bits)) & mask for col in range(size)]
+            value = row_tables[row][key] = line_conflicts([goal_col[tile] for tile in tiles if tile != 0 and goal_row[tile] == row])
+        return value
+
+    def col_conflicts(state, col):
+        key = 0
+        for row in range(size):
+            key |= ((state >> ((row * size + col) * bits)) & mask) << (row * bits)
+        value = col_tables[col].get(key)
+        if value is None:
+            tiles = [(key >> (row * bits)) & mask for row in range(size)]
+            value = col_tables[col][key] = line_conflicts([goal_row[tile] for tile in tiles if tile != 0 and goal_col[tile] == col])
+        return value
 
-    """ Possible Moves (up, down, left, right)
-    This list defines the directions in which the empty tile can move: down, up, right, and left, respectively.
-    Each move is a tuple representing the change in the row and column of the empty space if that move is made.
+    def evaluate(state):
+        return manhattan_evaluate(state) + sum(row_conflicts(state, line) + col_conflicts(state, line) for line in range(size))
+
+    """ Update
+    A vertical move only changes the content of the two rows involved (the order of the tiles in the column stays the same), and a horizontal move only changes the two columns involved
     """
-    moves = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+    def update(value, parent, child):
+        source_row, source_col = divmod(blank(child), size)
+        target_row, target_col = divmod(blank(parent), size)
+        value = manhattan_update(value, parent, child)
+        if source_row != target_row:
+            return value + row_conflicts(child, source_row) + row_conflicts(child, target_row) - row_conflicts(parent, source_row) - row_conflicts(parent, target_row)
+        return value + col_conflicts(child, source_col) + col_conflicts(child, target_col) - col_conflicts(parent, source_col) - col_conflicts(parent, target_col)
+    return evaluate, update
 
-    """For each move possible"""
-    for move in moves:
-        new_row = empty_tile_position[0] + move[0]
-        new_col = empty_tile_position[1] + move[1]
+""" Walking Distance
+Lower bound that looks at the rows and the columns separately. Ignoring which column each tile is in, a row configuration is, for every row, how many of its tiles belong to each goal row, plus the row of the empty tile. A vertical move swaps the empty tile with a tile of the row above or below, which changes the configuration; the walking distance of the rows is the number of vertical moves needed to reach the goal configuration. The same is done for the columns with horizontal moves, and the heuristic is the sum of both.
+It is admissible and at least as large as the Manhattan distance, since it also accounts for tiles that block each other within a row or column
+"""
+_walking_tables = {}
+WALKING_CACHE_SIZE = 1 << 16
 
-        """ Validate Move
-        This checks if the move is valid by ensuring the new position of the empty space is still within the bounds of the grid
-        """
-        if 0 <= new_row < len(state) and 0 <= new_col < len(state[0]):
-            """ Create New State 
-            A new state is created as a copy of the current state. The : is used to create a shallow copy of each row so that we don't alter the original state
-            """
-            neighbor_state = [row[:] for row in state]
-            """ Execute Move
-            The value at the new position of the empty space (which will be a numbered tile after the move) is moved to where the empty space was
-            The new position of the empty space is set to '0'
-            """
-            neighbor_state[empty_tile_position[0]][empty_tile_position[1]] = neighbor_state[new_row][new_col]
-            neighbor_state[new_row][new_col] = 0
-            """ Record Neighbor State
-            This modified 'neighbor_state' is added to the list 'neighbors', signifying it's a valid state reachable from the current state
+""" Walking Distance Size
+Largest board width supported: the 5x5 configuration space doesn't fit in memory
+"""
+MAX_WALKING_SIZE = 4
+
+""" Walking Table
+Returns the table of row walking distances for boards of the given size whose goal has the empty tile in row 'blank_row' (the column tables are the same, with columns as rows). Built once with a BFS from the goal configuration and cached: 25 configurations for 3x3 boards and 24,964 for 4x4. Raises ValueError for boards wider than MAX_WALKING_SIZE
+A configuration is encoded as an int, with 3 bits for the number of tiles of goal row g in row r at bit 3 * (r * size + g) and the row of the empty tile above them
+"""
+def walking_table(blank_row, size=SIZE):
+    table = _walking_tables.get((size, blank_row))
+    if table is not None:
+        return table
+    if size > MAX_WALKING_SIZE:
+        raise ValueError(f"Walking distance only supports boards of up to {MAX_WALKING_SIZE}x{MAX_WALKING_SIZE}")
+    blank_shift = 3 * size * size
+    goal = blank_row << blank_shift
+    for row in range(size):
+        goal |= (size - 1 if row == blank_row else size) << (3 * (row * size + row))
+    table = {goal: 0}
+    layer = [goal]
+    depth = 0
+    while layer:
+        depth += 1
+        next_layer = []
+        for configuration in layer:
+            empty = configuration >> blank_shift
+            """ Vertical Moves
+            A tile of goal row g moves from a neighboring row into the empty tile's row, and the empty tile takes its place
             """
-            neighbors.append(neighbor_state)
+            for row in (empty - 1, empty + 1):
+                if not 0 <= row < size:
+                    continue
+                for goal_row in range(size):
+                    if (configuration >> (3 * (row * size + goal_row))) & 7:
+                        neighbor = configuration - (1 << (3 * (row * size + goal_row))) + (1 << (3 * (empty * size + goal_row))) + ((row - empty) << blank_shift)
+                        if neighbor not in table:
+                            table[neighbor] = depth
+                            next_layer.append(neighbor)
+        layer = next_layer
+    _walking_tables[(size, blank_row)] = table
+    return table
 
-    """ Return Neighbors
-    The function returns the list 'neighbors', which contains all the new states that can be reached with one move from the current state
+def walking_distance_heuristic(final_state, size=SIZE):
+    bits = tile_bits(size)
+    mask = (1 << bits) - 1
+    blank = blank_function(size)
+    goals = goal_positions(final_state, size)
+    row_table = walking_table(goals[0] // size, size)
+    col_table = walking_table(goals[0] % size, size)
+    """ Configuration Parts
+    row_part[tile][position] is what a tile at 'position' adds to the row configuration (1 in the field of its current row and goal row), col_part the same for columns
     """
-    return neighbors
+    row_part = [[0 if tile == 0 else 1 << (3 * ((position // size) * size + goals[tile] // size)) for position in range(size * size)] for tile in range(size * size)]
+    col_part = [[0 if tile == 0 else 1 << (3 * ((position % size) * size + goals[tile] % size)) for position in range(size * size)] for tile in range(size * size)]
+    configuration_shift = 3 * size * size
+    """ Configuration Cache
+    The value alone doesn't tell the row and column configurations of a state, so the configurations of recently evaluated states are kept (and dropped all at once when there are too many), and a child's configurations are derived from its parent's
+    """
+    configurations = {}
 
-""" Reconstruct Path
-Used to traceback the path from the goal state to the initial state once a solution has been found using the DFS algorithm. It works by utilizing the information stored in the 'prev' dictionary, which holds the predecessors of each state visiting during the search
-It takes two parameters (state and prev)
-"""
-def reconstruct_path(state, prev):
-    path = []
-    """ Tracing Back the Path 
-    The function enters a loop that will continue until there is no previous state to go back to, which happens when the initial state is reached and its 'prev' entry is 'None'
+    def configure(state):
+        empty = blank(state)
+        rows = (empty // size) << configuration_shift
+        cols = (empty % size) << configuration_shift
+        for position in range(size * size):
+            tile = (state >> (position * bits)) & mask
+            rows += row_part[tile][position]
+            cols += col_part[tile][position]
+        return rows, cols
+
+    def evaluate(state):
+        rows, cols = configurations[state] = configure(state)
+        return row_table[rows] + col_table[cols]
+
+    """ Update
+    The moved tile went from the child's blank position to the parent's: only its part of the row (vertical move) or column (horizontal move) configuration changes, with the row or column of the empty tile
     """
-    while state is not None:
-        """ Append the Current State to the Path
-        The current state is added to the path list. In the first iteration, this is the goal state, and in subsequent iterations, it will be each predecessor state leading back to the initial state.
-        """
-        path.append(state)
-        """ Move to the Previous State 
-        The current state is updated to its predecessor state. This is done by looking up the current state in the prev dictionary.
-        Since lists are not hashable and cannot be used as keys in a dictionary, the state, which is a list of lists, is converted to a tuple of tuples. Tuples are hashable and can be used as keys.
-        prev.get() is a safe way of retrieving the predecessor state from the dictionary; if the key doesn't exist, it returns None. (and the while loop ends)
-        """
-        state = prev.get(tuple(map(tuple, state)))
-    """ Return the Reversed Path """
-    return path[::-1]
+    def update(value, parent, child):
+        known = configurations.get(parent)
+        rows, cols = known if known is not None else configure(parent)
+        source = blank(child)
+        target = blank(parent)
+        tile = (child >> (target * bits)) & mask
+        if source - target in (size, -size):
+            rows += row_part[tile][target] - row_part[tile][source] + ((source - target) // size << configuration_shift)
+        else:
+            cols += col_part[tile][target] - col_part[tile][source] + ((source - target) << configuration_shift)
+        if len(configurations) >= WALKING_CACHE_SIZE:
+            configurations.clear()
+        configurations[child] = (rows, cols)
+        return row_table[rows] + col_table[cols]
+    return evaluate, update
 
+""" Heuristics
+Maps the heuristic names accepted by the solvers to the functions that build them. Every builder takes (final_state, size) and returns (evaluate, update)
+"""
+HEURISTICS = {
+    'manhattan': lambda final_state, size=SIZE: table_heuristic(manhattan_table(final_state, size), size),
+    'hamming': lambda final_state, size=SIZE: table_heuristic(hamming_table(final_state, size), size),
+    'linear_conflict': linear_conflict_heuristic,
+    'walking_distance': walking_distance_heuristic,
+    'pattern_database': pattern_database_heuristic,
+}
+
+""" Kept Heuristics
+Long-running processes (see daemon.py) call keep_heuristics() so that make_heuristic returns the same pair for the same (heuristic, final state, size): later searches reuse the line conflict tables, walking distance configurations and pattern database placements filled by earlier ones, which are all keyed by content. Off by default, so every search starts cold and can be timed on its own
+"""
+_kept_heuristics = None
 
+def keep_heuristics(enabled=True):
+    global _kept_heuristics
+    _kept_heuristics = {} if enabled else None
+
+""" Make Heuristic
+Builds the (evaluate, update) pair of the named heuristic for the given final state, raising ValueError for unknown names
+"""
+def make_heuristic(heuristic, final_state, size=SIZE):
+    if heuristic not in HEURISTICS:
+        raise ValueError(f"Unknown heuristic: {heuristic}")
+    if _kept_heuristics is None:
+        return HEURISTICS[heuristic](final_state, size)
+    key = (heuristic, final_state, size)
+    pair = _kept_heuristics.get(key)
+    if pair is None:
+        pair = _kept_heuristics[key] = HEURISTICS[heuristic](final_state, size)
+    return pair
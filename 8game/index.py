@@ -1,30 +1,36 @@
 import random
-import bfs 
-import dfs
-import greedy
-import time
-import tracemalloc
-import io
+import board
+import cache
+import solver
+from stats import SearchStats
+from measure import Measurement, MODES
+import output
+import instances
+import argparse
 import sys
 
 """ Generate Random Matrix
-Generates a random 3x3 matrix that represents the 8 game puzzle
+Generates a random size x size matrix that represents the puzzle (3x3 for the 8 game, 4x4 for the 15 puzzle).
+When 'solvable_with' is given, the matrix is drawn among the ones that can reach it (see instances.random_solvable_state), so the pair is always solvable
 """
-def generate_random_matrix():
-    matrix = random.sample(range(0, 9), 9)
-    return [matrix[i:i+3] for i in range(0, len(matrix), 3)]
+def generate_random_matrix(size=board.SIZE, solvable_with=None):
+    if solvable_with is not None:
+        return board.unpack(instances.random_solvable_state(random, board.pack(solvable_with), size), size)
+    matrix = random.sample(range(0, size * size), size * size)
+    return [matrix[i:i+size] for i in range(0, len(matrix), size)]
 
 """ Create Manual Matrix
-Allows the user to manually input a 3x3 matrix. It validates the input to ensure it contains exactly nune different numbers between 0 and 9
+Allows the user to manually input a size x size matrix. It validates the input to ensure it contains exactly size * size different numbers between 0 and size * size - 1
 """
-def insert_manual_matrix():
+def insert_manual_matrix(size=board.SIZE):
+    count = size * size
     while True:
         try:
-            user_input = input("Enter the matrix (without repetitions, separated by commas, from 0 to 8): ")
+            user_input = input(f"Enter the matrix (without repetitions, separated by commas, from 0 to {count - 1}): ")
             numbers = [int(num) for num in user_input.split(",")]
-            if len(numbers) != 9 or len(set(numbers)) != 9:
-                raise ValueError("Please enter exactly 9 different numbers.")
-            return [numbers[i:i+3] for i in range(0, len(numbers), 3)]
+            if len(numbers) != count or sorted(numbers) != list(range(count)):
+                raise ValueError(f"Please enter exactly {count} different numbers from 0 to {count - 1}.")
+            return [numbers[i:i+size] for i in range(0, len(numbers), size)]
         except ValueError as e:
             print(e)
 
@@ -36,69 +42,120 @@ def print_matrix(matrix, title):
     for row in matrix:
         print(" ".join(map(str, row)))
 
-""" Print Puzzle
-Similar to Print Matrix but formats numbers to be right-justified for a uniform appearance
+""" Solvable Puzzle ?
+Determines if the puzzle can be solved, given the start and final matrices (see board.is_solvable)
 """
-def print_puzzle(state):
-    for row in state:
-        print(" ".join(map(lambda x: str(x).rjust(2), row)))
-    print()
-
-""" Count Inversions
-Counts the number of inversions in the puzzle.
-Inversions are pairs of tiles that are in the reverse order from where they ought to be. This count is crucial to determine if the puzzle is solvable
+def is_solvable(start_matrix, goal_matrix):
+    return board.is_solvable(board.pack(start_matrix), board.pack(goal_matrix), len(start_matrix))
+
+""" Print Performance Information
+The figures available depend on the measurement mode (see measure.py)
 """
-def count_inversions(sequence):
-    inv_count = 0
-    for i in range(len(sequence)):
-        for j in range(i + 1, len(sequence)):
-            if sequence[i] > sequence[j] and sequence[i] != 0 and sequence[j] != 0:
-                inv_count += 1
-    return inv_count
+def print_info(measurement, path, stats=None):
+    report = measurement.report()
+    print(f"Execution Time (Wall):\t{round(report['wall_seconds'], 4)} seconds")
+    print(f"Execution Time (CPU):\t{round(report['cpu_seconds'], 4)} seconds")
+    if "rss_growth_bytes" in report:
+        print(f"Memory Growth (RSS):\t{round(report['rss_growth_bytes'] / 1048576, 2)} MB")
+    if "peak_rss_bytes" in report:
+        print(f"Max Memory Used (RSS):\t{round(report['peak_rss_bytes'] / 1048576, 2)} MB")
+    if report.get("traced_peak_bytes") is not None:
+        print(f"Max Memory Used (Peak):\t{round(report['traced_peak_bytes'] / 1048576, 2)} MB")
+    if report.get("solver_bytes") is not None:
+        print(f"Solver Memory:\t\t{round(report['solver_bytes'] / 1048576, 2)} MB")
+    if stats is not None:
+        print(f"Nodes expanded:\t\t{stats.nodes_expanded} nodes")
+        print(f"Max search depth:\t{stats.max_depth} moves")
+        if stats.suboptimality is not None:
+            print(f"Suboptimality bound:\t{round(stats.suboptimality, 4)}")
+    print(f"Moves needed:\t\t{len(path) if path is not None else 0} moves")
 
-""" Solvable Puzzle ?
-Determines if the puzzle can be solved by comparing the parity of inversions in the start and final matrices. Puzzles are solvable if and only if the start and final configurations have the same inversion parity.
+""" Write to a file if #moves does not fit in console
+The path of packed boards is streamed step by step to the file (see output.py) in the chosen format, and only echoed to the console when 'echo' is set
 """
-def is_solvable(start_matrix, goal_matrix):
-    start_sequence = [tile for row in start_matrix for tile in row]
-    goal_sequence = [tile for row in goal_matrix for tile in row]
-    start_inversions = count_inversions(start_sequence)
-    goal_inversions = count_inversions(goal_sequence)
-    return (start_inversions % 2) == (goal_inversions % 2)
-
-""" Print Performance Information """
-def print_info(start_time, end_time, peak, path):
-    print(f"Max Memory Used (Peak):\t{round((peak/1048576),2)} MB")
-    print(f"Execution Time:\t\t{round(end_time - start_time, 2)} seconds")
-    print(f"Moves needed:\t\t{len(path)} moves")
-
-""" Write to a .txt file if #moves does not fit in console """
-def print_and_write_to_file(path, algorithm):
-    with open(f'solution_steps_{algorithm}.txt', 'w') as f:
-        # This block captures prints to a string
-        old_stdout = sys.stdout
-        sys.stdout = mystdout = io.StringIO()
-
-        print("Solution found!")
-        for step, state in enumerate(path):
-            print(f"Step {step + 1}")
-            print_puzzle(state)
-            print("")
-
-        # Reset stdout to its original value
-        sys.stdout = old_stdout
-
-        # Get the string from StringIO object and write it to the file.
-        puzzle_output = mystdout.getvalue()
-        f.write(puzzle_output)
-
-        # Also print the string to the console.
-        print(puzzle_output)
+def print_and_write_to_file(path, algorithm, output_format="boards", echo=True, size=board.SIZE):
+    file_name = output.write_solution(path, f"solution_steps_{algorithm}.{output.EXTENSIONS[output_format]}", output_format, echo, size)
+    print(f"Solution written to {file_name}")
+
+""" Select Heuristic
+Asks the user which heuristic the chosen informed search should use
+"""
+def select_heuristic(algorithm_name):
+    while True:
+        print(f"Select the heuristic for the {algorithm_name}:")
+        print("1. Manhattan Distance")
+        print("2. Hamming Distance")
+        print("3. Linear Conflict")
+        print("4. Walking Distance")
+        print("5. Pattern Database")
+        heuristic_choice = input("Option: ")
+        if heuristic_choice == "1":
+            return "manhattan"
+        elif heuristic_choice == "2":
+            return "hamming"
+        elif heuristic_choice == "3":
+            return "linear_conflict"
+        elif heuristic_choice == "4":
+            return "walking_distance"
+        elif heuristic_choice == "5":
+            return "pattern_database"
+        else:
+            print("Invalid choice!")
+
+""" Run Solver
+Solves the puzzle with the chosen algorithm (see solver.py), measured according to 'measure_mode' (see measure.py). Memory is sampled when the goal is found, while the search structures are still alive.
+Search statistics (nodes expanded, depth, suboptimality bound) are only collected and printed when memory is measured: counting costs time on every expansion, so with 'off' the solver runs without them and the times are those of the bare search.
+The solution is printed to the console, or written to a file in 'output_format' (see output.py) when it has 'file_threshold' or more steps. The board size is the one of the matrices; algorithms that don't support it report why.
+'time_budget' and 'max_nodes' bound the algorithms that accept budgets (see solver.BUDGET_ALGORITHMS), and 'width' sets the beam width of the algorithms that use one (see solver.WIDTH_ALGORITHMS).
+With 'result_cache' (a cache.SolverCache), a puzzle equivalent to one solved before with the same algorithm and heuristic is answered from the cache, without searching or measuring; new solutions are added to it and the cache file is saved. Runs with a budget or a beam width are not cached
+"""
+def run_solver(initial_matrix, final_matrix, algorithm, heuristic, label, file_name, file_threshold, measure_mode="fast", output_format="boards", echo=True, time_budget=None, max_nodes=None, width=None, result_cache=None):
+    print(f"Solving the puzzle using {label}...")
+    size = len(initial_matrix)
+    initial_state, final_state = board.pack(initial_matrix), board.pack(final_matrix)
+    key = None
+    if result_cache is not None and time_budget is None and max_nodes is None and width is None:
+        key = result_cache.key(initial_state, final_state, algorithm, heuristic, size)
+        found, moves = result_cache.lookup(key)
+        if found:
+            print("Solution taken from the result cache")
+            path = None if moves is None else board.path_from_moves(initial_state, moves, size)
+            print_solution(path, file_name, file_threshold, output_format, echo, size)
+            print(f"Moves needed:\t\t{len(path) if path is not None else 0} moves")
+            return
+    measurement = Measurement(measure_mode)
+    stats = None if measure_mode == "off" else SearchStats(on_goal=measurement.sample)
+    measurement.start()
+    try:
+        path = solver.solve(initial_state, final_state, algorithm, heuristic, size, stats=stats, time_budget=time_budget, max_nodes=max_nodes, width=width)
+    except ValueError as e:
+        print(e)
+        return
+    finally:
+        measurement.stop()
+    if key is not None:
+        result_cache.store(key, None if path is None else board.move_string(path, size))
+        if result_cache.path is not None:
+            result_cache.save()
+    print_solution(path, file_name, file_threshold, output_format, echo, size)
+    print_info(measurement, path, stats)
+
+""" Print Solution
+Prints the solution on the console, or writes it to a file when it has 'file_threshold' or more steps (see print_and_write_to_file)
+"""
+def print_solution(path, file_name, file_threshold, output_format="boards", echo=True, size=board.SIZE):
+    if path is not None:
+        if len(path) >= file_threshold:
+            print_and_write_to_file(path, file_name, output_format, echo, size)
+        else:
+            print("Solution found:")
+            sys.stdout.writelines(output.board_lines(path, size))
 
 """ Main Game Loop
 The main game loop that orchestrates user interaction, matrix generation, algorithm selection, and solving the puzzle.
+'measure_mode' selects how solves are measured (see measure.py), 'output_format' and 'echo' how long solutions are written (see print_and_write_to_file), 'size' the width of the board, 'time_budget' and 'max_nodes' the budgets of the anytime search, 'width' the width of the beam search and 'result_cache' the cache of solutions (see run_solver)
 """
-def main_game():
+def main_game(measure_mode="fast", output_format="boards", echo=True, size=board.SIZE, time_budget=None, max_nodes=None, width=None, result_cache=None):
     while True:
         """ Initial State Random or Manual """
         print("Select one of the following options for the initial matrix:")
@@ -107,9 +164,9 @@ def main_game():
         print("--------------------")
         choice = input("Option: ")
         if choice == "1":
-            initial_matrix = generate_random_matrix()
+            initial_matrix = generate_random_matrix(size)
         elif choice == "2":
-            initial_matrix = insert_manual_matrix()
+            initial_matrix = insert_manual_matrix(size)
 
 
         print("--------------------")
@@ -121,9 +178,9 @@ def main_game():
         print("--------------------")
         choice = input("Option: ")
         if choice == "1":
-            final_matrix = generate_random_matrix()
+            final_matrix = generate_random_matrix(size, initial_matrix)
         elif choice == "2":
-            final_matrix = insert_manual_matrix()
+            final_matrix = insert_manual_matrix(size)
 
         """ Print Both States"""
         print("--------------------")
@@ -144,6 +201,14 @@ def main_game():
             print("1. BFS")
             print("2. DFS")
             print("3. Greedy Best First")
+            print("4. A*")
+            print("5. IDA*")
+            print("6. Distance Database (3x3)")
+            print("7. Bidirectional BFS")
+            print("8. Depth-Limited DFS")
+            print("9. Iterative Deepening DFS")
+            print("10. Anytime Weighted A*")
+            print("11. Beam Search")
             print("--------------------")
             choice = input("Option: ")
             print("--------------------")
@@ -151,80 +216,62 @@ def main_game():
             """ Checks and executes (if valid) user's choice """
             # BFS
             if choice == "1":
-                start_time = time.time()
-                tracemalloc.start()
-                print("Solving the puzzle using BFS...")
-                path = bfs.bfs_algorithm(initial_matrix, final_matrix)
-                current, peak = tracemalloc.get_traced_memory()  # Capture both current and peak memory
-                tracemalloc.stop()  # Stop memory tracing
-                end_time = time.time()
-                if path is not None:
-                    if len(path) >= 25:
-                        print_and_write_to_file(path, algorithm="BFS")
-                    else:
-                        print("Solution found:")
-                        for step, state in enumerate(path):
-                            print("Step", step + 1)
-                            print_puzzle(state)
-                            print("")     
-                print_info(start_time, end_time, peak, path)              
+                run_solver(initial_matrix, final_matrix, "bfs", None, "BFS", "BFS", 25, measure_mode, output_format, echo, result_cache=result_cache)
                 break
             
             # DFS
             elif choice == "2":
-                start_time = time.time()
-                tracemalloc.start()
-                print("Solving the puzzle using DFS...")
-                path = dfs.dfs_algorithm(initial_matrix, final_matrix)
-                current, peak = tracemalloc.get_traced_memory()  # Capture both current and peak memory
-                tracemalloc.stop()  # Stop memory tracing
-                end_time = time.time()
-                if path is not None:
-                    if len(path) >= 50:
-                        print_and_write_to_file(path, algorithm="DFS")
-                    else:
-                        print("Solution found:")
-                        for step, state in enumerate(path):
-                            print("Step", step + 1)
-                            print_puzzle(state)
-                            print("") 
-                print_info(start_time, end_time, peak, path)
+                run_solver(initial_matrix, final_matrix, "dfs", None, "DFS", "DFS", 50, measure_mode, output_format, echo, result_cache=result_cache)
                 break
 
             # Greedy BF
             elif choice == "3":
-                # Heuristic Search
-                while True:
-                    print("Select the heuristic for the Greedy Best First Search:")
-                    print("1. Manhattan Distance")
-                    print("2. Hamming Distance")
-                    heuristic_choice = input("Option: ")
-                    if heuristic_choice == "1":
-                        heuristic = "manhattan"
-                        break
-                    elif heuristic_choice == "2":
-                        heuristic = "hamming"
-                        break
-                    else:
-                        print("Invalid choice!")
-                
-                print(f"Solving the puzzle using Greedy Best First Search with {heuristic} heuristic...")
-                start_time = time.time()
-                tracemalloc.start()
-                path = greedy.greedy_best_first_search(initial_matrix, final_matrix, heuristic)
-                current, peak = tracemalloc.get_traced_memory()  # Capture both current and peak memory
-                tracemalloc.stop()  # Stop memory tracing
-                end_time = time.time()
-                if path is not None:
-                    if len(path) >= 25:
-                        print_and_write_to_file(path, algorithm=f"Greedy_{heuristic}")
-                    else:
-                        print("Solution found:")
-                        for step, state in enumerate(path):
-                            print("Step", step + 1)
-                            print_puzzle(state)
-                            print("") 
-                print_info(start_time, end_time, peak, path)
+                heuristic = select_heuristic("Greedy Best First Search")
+                run_solver(initial_matrix, final_matrix, "greedy", heuristic, f"Greedy Best First Search with {heuristic} heuristic", f"Greedy_{heuristic}", 25, measure_mode, output_format, echo, result_cache=result_cache)
+                break
+
+            # A*
+            elif choice == "4":
+                heuristic = select_heuristic("A* Search")
+                run_solver(initial_matrix, final_matrix, "astar", heuristic, f"A* Search with {heuristic} heuristic", f"AStar_{heuristic}", 25, measure_mode, output_format, echo, result_cache=result_cache)
+                break
+
+            # IDA*
+            elif choice == "5":
+                heuristic = select_heuristic("IDA* Search")
+                run_solver(initial_matrix, final_matrix, "idastar", heuristic, f"IDA* Search with {heuristic} heuristic", f"IDAStar_{heuristic}", 25, measure_mode, output_format, echo, result_cache=result_cache)
+                break
+
+            # Distance Database
+            elif choice == "6":
+                run_solver(initial_matrix, final_matrix, "oracle", None, "the distance database", "Oracle", 25, measure_mode, output_format, echo, result_cache=result_cache)
+                break
+
+            # Bidirectional BFS
+            elif choice == "7":
+                run_solver(initial_matrix, final_matrix, "bidirectional", None, "Bidirectional BFS", "Bidirectional_BFS", 25, measure_mode, output_format, echo, result_cache=result_cache)
+                break
+
+            # Depth-Limited DFS
+            elif choice == "8":
+                run_solver(initial_matrix, final_matrix, "dls", None, "Depth-Limited DFS", "DLS", 25, measure_mode, output_format, echo, result_cache=result_cache)
+                break
+
+            # Iterative Deepening DFS
+            elif choice == "9":
+                run_solver(initial_matrix, final_matrix, "iddfs", None, "Iterative Deepening DFS", "IDDFS", 25, measure_mode, output_format, echo, result_cache=result_cache)
+                break
+
+            # Anytime Weighted A*
+            elif choice == "10":
+                heuristic = select_heuristic("Anytime Weighted A* Search")
+                run_solver(initial_matrix, final_matrix, "anytime", heuristic, f"Anytime Weighted A* Search with {heuristic} heuristic", f"Anytime_{heuristic}", 25, measure_mode, output_format, echo, time_budget, max_nodes, result_cache=result_cache)
+                break
+
+            # Beam Search
+            elif choice == "11":
+                heuristic = select_heuristic("Beam Search")
+                run_solver(initial_matrix, final_matrix, "beam", heuristic, f"Beam Search with {heuristic} heuristic", f"Beam_{heuristic}", 25, measure_mode, output_format, echo, width=width, result_cache=result_cache)
                 break
             else:
                 print("Invalid choice. Please choose one of the provided options.\n")
@@ -243,4 +290,21 @@ def main_game():
             if continue_game == False:
                 break
 
-main_game()
\ No newline at end of file
+""" Command Line
+python index.py [--size N] [--measure off|fast|full] [--format boards|moves|binary] [--no-echo] [--time-budget SECONDS] [--max-nodes N] [--beam-width K] [--cache-file FILE]
+"""
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="8 game puzzle solver")
+    parser.add_argument("--size", type=int, default=board.SIZE, help="board width (default: 3, 4 for the 15 puzzle)")
+    parser.add_argument("--measure", choices=MODES, default="fast", help="off: time only, without search statistics, fast: time, RSS and search statistics (default), full: like fast, plus tracemalloc")
+    parser.add_argument("--format", choices=output.FORMATS, default="boards", help="format of solution files (default: boards)")
+    parser.add_argument("--no-echo", action="store_true", help="don't print solutions written to a file on the console")
+    parser.add_argument("--time-budget", type=float, default=None, help="seconds after which the anytime search returns its best solution")
+    parser.add_argument("--max-nodes", type=int, default=None, help="expanded states after which the anytime search returns its best solution")
+    parser.add_argument("--beam-width", type=int, default=None, help="states kept per layer by the beam search (default: 1000)")
+    parser.add_argument("--cache-file", help="file of solutions kept between runs; equivalent puzzles are answered from it (see cache.py)")
+    arguments = parser.parse_args()
+    if arguments.size < 2:
+        parser.error("--size must be at least 2")
+    result_cache = cache.SolverCache(path=arguments.cache_file) if arguments.cache_file else None
+    main_game(arguments.measure, arguments.format, not arguments.no_echo, arguments.size, arguments.time_budget, arguments.max_nodes, arguments.beam_width, result_cache)
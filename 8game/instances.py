@@ -0,0 +1,177 @@
+import argparse
+import json
+import random
+import sys
+from array import array
+import oracle
+from board import SIZE, NO_MOVE, from_tiles, to_tiles, canonical_goal, blank_position, solvability_parity, successor_function, goal_relabeling, relabel, unrank
+from astar import ida_star_search
+from pattern_database import DEFAULT_PARTITIONS
+
+""" Instance Generator
+Seeded generator of solvable puzzle instances, for benchmark corpora and load tests. No instance is ever rejected for being unsolvable:
+- shuffle - a uniformly random board; when its parity (see board.solvability_parity) differs from the goal's, two tiles are swapped, which flips it. Every solvable board is equally likely
+- walk - a random walk of the empty tile from the goal, without immediately undoing a move
+Instances can also target an optimal depth, or a range of depths. On 3x3 boards they are drawn directly among the states at those depths, listed from the distance database (see oracle.py), so every state in the range is equally likely and nothing is rejected. On larger boards, random walks are solved exactly with IDA* and the walks whose depth falls outside the range are drawn again, which is only fast for shallow targets
+"""
+METHODS = ("shuffle", "walk")
+DEFAULT_WALK_LENGTH = 200
+
+""" Random Solvable State
+A uniformly random board with the same parity as 'final_state'. The swapped tiles are the first two when neither is the empty tile, and the last two otherwise: the swap only depends on the empty tile's position, which it keeps, so it pairs every unsolvable board with one solvable board
+"""
+def random_solvable_state(rng, final_state, size=SIZE):
+    tiles = list(range(size * size))
+    rng.shuffle(tiles)
+    state = from_tiles(tiles, size)
+    if solvability_parity(state, size) == solvability_parity(final_state, size):
+        return state
+    first, second = (0, 1) if tiles[0] and tiles[1] else (size * size - 2, size * size - 1)
+    tiles[first], tiles[second] = tiles[second], tiles[first]
+    return from_tiles(tiles, size)
+
+""" Random Walk State
+The state reached by 'steps' random moves of the empty tile from 'state'
+"""
+def random_walk_state(rng, state, steps, size=SIZE):
+    successors = successor_function(size)
+    last_move = NO_MOVE
+    for step in range(steps):
+        last_move, state = rng.choice(successors(state, last_move))
+    return state
+
+""" Depth Ranks
+Lists, for the canonical goal with the empty tile at 'blank', the ranks (see board.rank) of the 3x3 states at every distance: ranks[depth] is an array of 32-bit ranks. Built once per goal from the distance database and cached
+"""
+_depth_ranks = {}
+
+def depth_ranks(blank, directory=oracle.DATABASE_DIRECTORY):
+    key = (blank, directory)
+    ranks = _depth_ranks.get(key)
+    if ranks is None:
+        ranks = {}
+        for value, depth in enumerate(oracle.load_database(blank, directory)[:]):
+            if depth != oracle.UNREACHABLE:
+                if depth not in ranks:
+                    ranks[depth] = array("I")
+                ranks[depth].append(value)
+        _depth_ranks[key] = ranks
+    return ranks
+
+""" Depth Sample
+A uniformly random 3x3 state whose distance to 'final_state' is between 'low' and 'high', with that distance. The state is drawn relative to the canonical goal, then relabeled back with the inverse of the goal's relabeling
+"""
+def depth_sample(rng, final_state, low, high, directory=oracle.DATABASE_DIRECTORY):
+    ranks = depth_ranks(blank_position(final_state, oracle.SIZE), directory)
+    pools = [(depth, ranks[depth]) for depth in range(low, high + 1) if depth in ranks]
+    index = rng.randrange(sum(len(pool) for depth, pool in pools)) if pools else None
+    if index is None:
+        raise ValueError(f"No 3x3 state is between {low} and {high} moves away from the goal")
+    inverse = [0] * (oracle.SIZE * oracle.SIZE)
+    for tile, canonical_tile in enumerate(goal_relabeling(final_state, oracle.SIZE)):
+        inverse[canonical_tile] = tile
+    for depth, pool in pools:
+        if index < len(pool):
+            return relabel(unrank(pool[index], oracle.SIZE), inverse, oracle.SIZE), depth
+        index -= len(pool)
+
+""" Exact Depth
+Optimal number of moves between two boards: from the distance database on 3x3 boards, otherwise by IDA* with the pattern databases (see pattern_database.py) where a partition exists, and the linear conflict otherwise
+"""
+def exact_depth(state, final_state, size=SIZE, directory=oracle.DATABASE_DIRECTORY):
+    if size == oracle.SIZE:
+        return oracle.distance(state, final_state, directory)
+    heuristic = "pattern_database" if size in DEFAULT_PARTITIONS else "linear_conflict"
+    return len(ida_star_search(state, final_state, heuristic, size)) - 1
+
+""" Walk Sample
+A random walk whose exact depth is between 'low' and 'high', with that depth. Walks of length between 'low' and 'high' are tried; every walk that folds back below 'low' makes the next one 2 moves longer, and every walk that overshoots 'high' makes it 2 moves shorter again (the length never drops below the range).
+Raises ValueError after 'attempts' walks without a depth in the range
+"""
+MAX_WALK_ATTEMPTS = 1000
+
+def walk_sample(rng, final_state, low, high, size=SIZE, attempts=MAX_WALK_ATTEMPTS):
+    extra = 0
+    for attempt in range(attempts):
+        state = random_walk_state(rng, final_state, rng.randint(low, high) + extra, size)
+        depth = exact_depth(state, final_state, size)
+        if low <= depth <= high:
+            return state, depth
+        if depth < low:
+            extra += 2
+        else:
+            extra = max(0, extra - 2)
+    raise ValueError(f"No random walk between {low} and {high} moves away from the goal found in {attempts} attempts")
+
+""" Generate Instances
+Generator of 'count' instances, as {"start", "goal", "depth"} dictionaries with flat tile lists like benchmark.build_corpus ("depth" is None when no depth was targeted). The same seed always yields the same instances.
+- depth - None, an exact depth, or a (low, high) range
+- method - how starts are drawn when no depth is targeted (see METHODS); 'walk_length' is the length of the walks
+- final_state - the goal of every instance (by default the canonical goal); with 'random_goal', every instance gets its own random goal
+"""
+def generate_instances(count, size=SIZE, depth=None, seed=None, method="shuffle", walk_length=DEFAULT_WALK_LENGTH, final_state=None, random_goal=False):
+    if method not in METHODS:
+        raise ValueError(f"Unknown method: {method}")
+    if isinstance(depth, int):
+        depth = (depth, depth)
+    if depth is not None and not 0 <= depth[0] <= depth[1]:
+        raise ValueError(f"Invalid depth range: {depth[0]}-{depth[1]}")
+    rng = random.Random(seed)
+    goal = canonical_goal(size=size) if final_state is None else final_state
+    for index in range(count):
+        if random_goal:
+            goal = from_tiles(rng.sample(range(size * size), size * size), size)
+        distance = None
+        if depth is not None and size == oracle.SIZE:
+            start, distance = depth_sample(rng, goal, depth[0], depth[1])
+        elif depth is not None:
+            start, distance = walk_sample(rng, goal, depth[0], depth[1], size)
+        elif method == "shuffle":
+            start = random_solvable_state(rng, goal, size)
+        else:
+            start = random_walk_state(rng, goal, walk_length, size)
+        yield {"start": to_tiles(start, size), "goal": to_tiles(goal, size), "depth": distance}
+
+""" Parse Depth
+Reads "D" as an exact depth and "LOW-HIGH" as a range
+"""
+def parse_depth(text):
+    low, separator, high = text.partition("-")
+    return (int(low), int(high)) if separator else int(low)
+
+""" Command Line
+python instances.py COUNT [--size N] [--depth D|LOW-HIGH] [--seed S] [--method shuffle|walk] [--walk-length N] [--random-goal] [--jobs ALGORITHM [HEURISTIC]] [--output FILE]
+Writes one instance per line: a JSON object by default, or with --jobs a job line for batch.py
+"""
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Generate solvable puzzle instances")
+    parser.add_argument("count", type=int)
+    parser.add_argument("--size", type=int, default=SIZE)
+    parser.add_argument("--depth", type=parse_depth, help="optimal depth, or LOW-HIGH range of depths")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--method", choices=METHODS, default="shuffle", help="how starts are drawn without --depth (default: shuffle)")
+    parser.add_argument("--walk-length", type=int, default=DEFAULT_WALK_LENGTH)
+    parser.add_argument("--random-goal", action="store_true", help="draw a random goal for every instance (default: the canonical goal)")
+    parser.add_argument("--jobs", nargs="+", metavar="ALGORITHM", help="write batch.py job lines with this algorithm and optional heuristic")
+    parser.add_argument("--output", help="output file (default: stdout)")
+    options = parser.parse_args(arguments)
+    if options.size < 2:
+        parser.error("--size must be at least 2")
+
+    output = open(options.output, "w") if options.output else sys.stdout
+    try:
+        for instance in generate_instances(options.count, options.size, options.depth, options.seed, options.method, options.walk_length, random_goal=options.random_goal):
+            if options.jobs:
+                output.write(f"{','.join(map(str, instance['start']))} {','.join(map(str, instance['goal']))} {' '.join(options.jobs)}\n")
+            else:
+                output.write(json.dumps(instance) + "\n")
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        if options.output:
+            output.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import os
+import sys
+import time
+import tracemalloc
+try:
+    import resource
+except ImportError:
+    resource = None
+
+""" Measurement Modes
+How a solve is measured. tracemalloc hooks every allocation and slows the search down several times, so it is only used when asked for:
+- off - wall and CPU time only (two clock reads, nothing traced); index.py also runs the solver without search statistics (see stats.py)
+- fast - wall and CPU time with perf_counter_ns/process_time_ns, plus resident memory (RSS) read from /proc or getrusage
+- full - like fast, plus tracemalloc, reporting the traced peak and the memory held by the solver modules while the search structures are alive
+"""
+MODES = ("off", "fast", "full")
+SOLVER_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+""" Current RSS
+Resident memory of this process in bytes, from /proc/self/statm, or None where /proc is not available
+"""
+def current_rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+""" Peak RSS
+Largest resident memory of this process so far in bytes, from getrusage (reported in kilobytes on Linux and in bytes on macOS), or None where it is not available
+"""
+def peak_rss():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+class Measurement:
+    def __init__(self, mode="fast"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown measurement mode: {mode}")
+        self.mode = mode
+        self.wall_ns = None
+        self.cpu_ns = None
+        self.rss_before = None
+        self.rss_sample = None
+        self.traced_peak = None
+        self.solver_bytes = None
+
+    """ Start / Stop
+    Bracket the code being measured. In full mode tracemalloc runs only between them
+    """
+    def start(self):
+        if self.mode != "off":
+            self.rss_before = current_rss()
+        if self.mode == "full":
+            tracemalloc.start()
+        self.cpu_start = time.process_time_ns()
+        self.wall_start = time.perf_counter_ns()
+
+    def stop(self):
+        self.wall_ns = time.perf_counter_ns() - self.wall_start
+        self.cpu_ns = time.process_time_ns() - self.cpu_start
+        if self.mode == "full":
+            self.traced_peak = tracemalloc.get_traced_memory()[1]
+            if self.solver_bytes is None:
+                self.sample()
+            tracemalloc.stop()
+        if self.mode != "off" and self.rss_sample is None:
+            self.sample()
+
+    """ Sample
+    Records the memory in use right now. Solvers call it through the on_goal hook of SearchStats (see stats.py), when their frontier and explored set are still alive; otherwise it is taken when the measurement stops.
+    In full mode it takes a tracemalloc snapshot filtered to the solver modules (this directory, except index.py and measure.py)
+    """
+    def sample(self, *arguments):
+        if self.mode == "off":
+            return
+        self.rss_sample = current_rss()
+        if self.mode == "full" and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(True, os.path.join(SOLVER_DIRECTORY, "*")),
+                tracemalloc.Filter(False, os.path.join(SOLVER_DIRECTORY, "index.py")),
+                tracemalloc.Filter(False, os.path.join(SOLVER_DIRECTORY, "measure.py")),
+            ))
+            self.solver_bytes = sum(statistic.size for statistic in snapshot.statistics("filename"))
+
+    """ Report
+    The measured figures, by name. Memory figures are only present in the modes that measure them
+    """
+    def report(self):
+        report = {"mode": self.mode, "wall_seconds": self.wall_ns / 1e9, "cpu_seconds": self.cpu_ns / 1e9}
+        if self.mode != "off":
+            if self.rss_before is not None and self.rss_sample is not None:
+                report["rss_growth_bytes"] = self.rss_sample - self.rss_before
+            if peak_rss() is not None:
+                report["peak_rss_bytes"] = peak_rss()
+        if self.mode == "full":
+            report["traced_peak_bytes"] = self.traced_peak
+            report["solver_bytes"] = self.solver_bytes
+        return report
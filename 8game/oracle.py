@@ -0,0 +1,108 @@
+import math
+import mmap
+import os
+from board import SIZE, successor_function, rank, canonical_goal, goal_relabeling, relabel, blank_position
+
+""" Distance Database
+The 3x3 puzzle has only 181,440 states reachable from any goal. A one-time retrograde BFS from a canonical goal stores the exact distance of every state to that goal in a file with one byte per permutation, indexed by the state's Lehmer rank (see board.rank). Unreachable permutations hold UNREACHABLE.
+There is one file per position of the empty tile in the goal, since relabeling tiles can map any goal onto a canonical goal but can't move the empty tile. Files are built on first use (or all at once with "python oracle.py") and then loaded with mmap, so queries read the distances straight from the page cache
+"""
+UNREACHABLE = 255
+DATABASE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "distances")
+_databases = {}
+
+""" Database Path
+Returns the file that stores the distances to the canonical goal with the empty tile at position 'blank'
+"""
+def database_path(blank, directory=DATABASE_DIRECTORY):
+    return os.path.join(directory, f"distances_{SIZE}x{SIZE}_blank{blank}.bin")
+
+""" Build Database
+Runs the retrograde BFS from the canonical goal with the empty tile at 'blank' and writes the distance file. The file is written under a temporary name and then renamed, so a partially written file is never loaded
+"""
+def build_database(blank, directory=DATABASE_DIRECTORY):
+    successors = successor_function(SIZE)
+    goal = canonical_goal(blank, SIZE)
+    depths = {goal: 0}
+    layer = [goal]
+    depth = 0
+    """ BFS Layers
+    Every state of a layer is expanded, and each neighbor that has no distance yet gets the next depth. Ranks are only computed once per state, when the file is filled
+    """
+    while layer:
+        depth += 1
+        next_layer = []
+        for state in layer:
+            for move, neighbor in successors(state):
+                if neighbor not in depths:
+                    depths[neighbor] = depth
+                    next_layer.append(neighbor)
+        layer = next_layer
+
+    distances = bytearray([UNREACHABLE]) * math.factorial(SIZE * SIZE)
+    for state, depth in depths.items():
+        distances[rank(state, SIZE)] = depth
+
+    os.makedirs(directory, exist_ok=True)
+    path = database_path(blank, directory)
+    with open(path + ".tmp", "wb") as f:
+        f.write(distances)
+    os.replace(path + ".tmp", path)
+    return path
+
+""" Load Database
+Returns the memory-mapped distance file for goals with the empty tile at 'blank', building it first if it doesn't exist yet
+"""
+def load_database(blank, directory=DATABASE_DIRECTORY):
+    key = (blank, directory)
+    database = _databases.get(key)
+    if database is None:
+        path = database_path(blank, directory)
+        if not os.path.exists(path):
+            build_database(blank, directory)
+        with open(path, "rb") as f:
+            database = _databases[key] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return database
+
+""" Distance
+Returns the exact number of moves from 'state' to 'final_state', or None if the final state can't be reached
+"""
+def distance(state, final_state, directory=DATABASE_DIRECTORY):
+    database = load_database(blank_position(final_state, SIZE), directory)
+    value = database[rank(relabel(state, goal_relabeling(final_state, SIZE), SIZE), SIZE)]
+    return None if value == UNREACHABLE else value
+
+""" Oracle Solver
+Returns an optimal path from initial_state to final_state without searching: starting at the initial state, it repeatedly moves to the neighbor whose stored distance is one less, until the goal is reached.
+Only 3x3 boards are supported. With 'stats', every state of the path except the goal counts as expanded
+"""
+def oracle_solve(initial_state, final_state, size=SIZE, directory=DATABASE_DIRECTORY, stats=None):
+    if size != SIZE:
+        raise ValueError("The distance database only supports 3x3 boards")
+    database = load_database(blank_position(final_state, SIZE), directory)
+    mapping = goal_relabeling(final_state, SIZE)
+    successors = successor_function(SIZE)
+
+    state = initial_state
+    remaining = database[rank(relabel(state, mapping, SIZE), SIZE)]
+    if remaining == UNREACHABLE:
+        return None if stats is None else stats.finish(None)
+    path = [state]
+    while remaining > 0:
+        children = successors(state)
+        if stats is not None:
+            stats.expand(state, 1, len(children))
+        for move, neighbor in children:
+            if database[rank(relabel(neighbor, mapping, SIZE), SIZE)] == remaining - 1:
+                state = neighbor
+                break
+        path.append(state)
+        remaining -= 1
+    return path if stats is None else stats.finish(path, max_depth=len(path) - 1)
+
+""" Build Step
+Running "python oracle.py" builds the distance files for every position of the empty tile
+"""
+if __name__ == "__main__":
+    for blank in range(SIZE * SIZE):
+        print(f"Built {build_database(blank)}")
@@ -0,0 +1,119 @@
+import struct
+import sys
+from itertools import islice
+from board import SIZE, MOVES, unpack, to_tiles, from_tiles, path_moves
+
+""" Solution Output
+Writes solution paths step by step from the path to a buffered file, so long solutions (DFS finds paths with tens of thousands of steps) need constant memory besides the path itself. Formats:
+- boards - every board of the path, as printed on the console ("Step n" and the matrix)
+- moves - the directions the empty tile moves in, e.g. "UULDR..." (see board.move_string)
+- binary - a header with the board size, the initial board and the number of moves, followed by the moves at 2 bits each (four per byte, first move in the lowest bits)
+"""
+FORMATS = ("boards", "moves", "binary")
+EXTENSIONS = {"boards": "txt", "moves": "txt", "binary": "bin"}
+BUFFER_SIZE = 1 << 16
+CHUNK_MOVES = 4096
+BINARY_MAGIC = b"8GS1"
+BINARY_COUNT = struct.Struct("<I")
+
+""" Board Lines
+Generator of the text of each step of the path: "Step n" and the board with right-justified numbers
+"""
+def board_lines(path, size=SIZE):
+    for step, state in enumerate(path):
+        rows = "\n".join(" ".join(str(x).rjust(2) for x in row) for row in unpack(state, size))
+        yield f"Step {step + 1}\n{rows}\n\n\n"
+
+""" Move Chunks
+Generator of the move string of the path, in pieces of at most 'chunk' moves
+"""
+def move_chunks(path, size=SIZE, chunk=CHUNK_MOVES):
+    moves = path_moves(path, size)
+    while True:
+        piece = "".join(MOVES[move] for move in islice(moves, chunk))
+        if not piece:
+            return
+        yield piece
+
+""" Binary Chunks
+Generator of the packed moves of the path, in pieces of at most 'chunk' moves (a multiple of 4). The move count is sent to 'count' (a one-element list) when the path ends, since the path may be a generator of unknown length
+"""
+def binary_chunks(path, size=SIZE, count=None, chunk=CHUNK_MOVES):
+    moves = path_moves(path, size)
+    total = 0
+    while True:
+        piece = list(islice(moves, chunk))
+        if not piece:
+            break
+        total += len(piece)
+        packed = bytearray((len(piece) + 3) // 4)
+        for index, move in enumerate(piece):
+            packed[index >> 2] |= move << ((index & 3) * 2)
+        yield bytes(packed)
+    if count is not None:
+        count[0] = total
+
+""" Write Solution
+Streams the path (a list or any iterable of packed states) to 'file_name' in the given format, and returns the file name. With 'echo', the text formats are also written to the console as they are produced (the binary format echoes its move string)
+"""
+def write_solution(path, file_name, output_format="boards", echo=False, size=SIZE):
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown output format: {output_format}")
+    if output_format == "binary":
+        return write_binary_solution(path, file_name, echo, size)
+    with open(file_name, "w", buffering=BUFFER_SIZE) as f:
+        if output_format == "boards":
+            f.write("Solution found!\n")
+            chunks = board_lines(path, size)
+        else:
+            chunks = move_chunks(path, size)
+        if echo:
+            sys.stdout.write("Solution found!\n" if output_format == "boards" else "Moves: ")
+        for chunk in chunks:
+            f.write(chunk)
+            if echo:
+                sys.stdout.write(chunk)
+        if output_format == "moves":
+            f.write("\n")
+            if echo:
+                sys.stdout.write("\n")
+    return file_name
+
+""" Write Binary Solution
+The move count is written as 0 first and filled in once all moves are written, so the path is only traversed once
+"""
+def write_binary_solution(path, file_name, echo=False, size=SIZE):
+    states = iter(path)
+    initial_state = next(states)
+    count = [0]
+
+    def all_states():
+        yield initial_state
+        for state in states:
+            yield state
+
+    with open(file_name, "wb", buffering=BUFFER_SIZE) as f:
+        f.write(BINARY_MAGIC + bytes([size]) + bytes(to_tiles(initial_state, size)))
+        count_offset = f.tell()
+        f.write(BINARY_COUNT.pack(0))
+        for chunk in binary_chunks(all_states(), size, count):
+            f.write(chunk)
+        f.seek(count_offset)
+        f.write(BINARY_COUNT.pack(count[0]))
+    if echo:
+        print(f"Moves: {read_binary_solution(file_name)[1]}")
+    return file_name
+
+""" Read Binary Solution
+Inverse of write_binary_solution: returns (initial_state, moves, size), with the moves as a move string (replay them with board.path_from_moves). Raises ValueError for files in another format
+"""
+def read_binary_solution(file_name):
+    with open(file_name, "rb") as f:
+        if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError(f"{file_name} is not a binary solution file")
+        size = f.read(1)[0]
+        initial_state = from_tiles(list(f.read(size * size)), size)
+        count = BINARY_COUNT.unpack(f.read(BINARY_COUNT.size))[0]
+        packed = f.read((count + 3) // 4)
+    moves = "".join(MOVES[(packed[index >> 2] >> ((index & 3) * 2)) & 3] for index in range(count))
+    return initial_state, moves, size
@@ -0,0 +1,253 @@
+import multiprocessing
+import os
+import queue
+import time
+from bucket_queue import BucketQueue
+from board import SIZE, successor_function
+from greedy import make_heuristic
+
+""" Parallel Best-First Search
+Hash-distributed search (HDA*) for single hard instances. Every state is owned by one worker process, chosen by a hash of the state (see owner). Each worker keeps its own frontier and closed map for the states it owns; the children it generates for other workers are collected per owner and sent in batches through that owner's queue.
+- astar mode - states are ranked by f = g + h. A solution is only accepted once no worker holds a state with f below its cost, so the path is optimal, like a_star_search
+- greedy mode - states are ranked by h, and the search stops at the first solution, like greedy_best_first_search
+Messages sent to a worker's inbox:
+- ("states", [(state, g, h, parent), ...]) - a batch of generated states owned by that worker
+- ("parent", state) - asks for the parent of a state, answered on the results queue during path reconstruction
+- ("stop",) - ends the worker, which answers with its counters
+"""
+MODES = ("astar", "greedy")
+BATCH_SIZE = 256
+EXPANSIONS_PER_POLL = 64
+POLL_SECONDS = 0.002
+NO_SOLUTION = 1 << 62
+
+""" Owner
+Worker owning a state. Packed states differ in a few low bits between neighbors, so they are mixed with a multiplicative hash before taking the remainder
+"""
+def owner(state, workers):
+    return ((state * 0x9E3779B97F4A7C15) >> 17 & 0xFFFFFFFF) % workers
+
+""" Termination Detection
+Each worker publishes in the shared 'status' array the number of batches it has sent and received and whether it is idle (empty frontier, empty inbox, nothing left to send); the last slot is used by the coordinator, which sends the initial state.
+A worker only becomes busy again by receiving a batch, which changes the counters. So when two consecutive reads of the array are identical, every worker is idle and every sent batch was received, no work is left anywhere (the four-counter method)
+"""
+STATUS_FIELDS = 3
+
+def read_status(status):
+    with status.get_lock():
+        return list(status)
+
+def terminated(first, second):
+    if first != second:
+        return False
+    sent = sum(first[index] for index in range(0, len(first), STATUS_FIELDS))
+    received = sum(first[index] for index in range(1, len(first), STATUS_FIELDS))
+    idle = all(first[index] for index in range(2, len(first), STATUS_FIELDS))
+    return idle and sent == received
+
+""" Worker Liveness
+Workers only exit after a "stop" message, with exit code 0. Any other exit (an exception, or a killed process) ends the search with RuntimeError instead of leaving the coordinator waiting for batches or answers that will never come
+"""
+def check_workers(processes):
+    for process in processes:
+        if process.exitcode not in (None, 0):
+            raise RuntimeError(f"Parallel search worker {process.name} exited with code {process.exitcode}")
+
+""" Next Result
+Next message of the results queue, checking the workers while waiting for it
+"""
+def next_result(results, processes):
+    while True:
+        check_workers(processes)
+        try:
+            return results.get(timeout=POLL_SECONDS)
+        except queue.Empty:
+            pass
+
+""" Worker
+Main loop of a worker process. 'best' is the shared cost of the best solution found so far; in astar mode, states whose f is not below it are pruned
+"""
+def worker(index, workers, final_state, heuristic, size, mode, inboxes, results, status, best, done):
+    evaluate, update = make_heuristic(heuristic, final_state, size)
+    successors = successor_function(size)
+    inbox = inboxes[index]
+    frontier = BucketQueue("lifo")
+    """ Closed Map
+    closed[state] = (g, parent) for every state owned by this worker, with the lowest g received so far
+    """
+    closed = {}
+    outgoing = [[] for other in range(workers)]
+    counters = {"nodes_expanded": 0, "nodes_generated": 0, "duplicates": 0, "max_depth": 0, "stored": 0}
+    sent = received = 0
+    base = index * STATUS_FIELDS
+
+    def publish(idle):
+        with status.get_lock():
+            status[base] = sent
+            status[base + 1] = received
+            status[base + 2] = idle
+
+    """ Receive
+    Adds a batch of states to the frontier, keeping only the cheapest way found to each of them. In astar mode, states that can't lead to a cheaper solution than the best one are dropped
+    """
+    def receive(batch):
+        for state, g, h, parent in batch:
+            if mode == "astar" and g + h >= best.value:
+                continue
+            entry = closed.get(state)
+            if entry is not None and entry[0] <= g:
+                counters["duplicates"] += 1
+                continue
+            closed[state] = (g, parent)
+            if state == final_state:
+                with best.get_lock():
+                    if g < best.value:
+                        best.value = g
+                continue
+            frontier.push(h if mode == "greedy" else g + h, (g, h, state))
+
+    def flush(force):
+        nonlocal sent
+        for other, batch in enumerate(outgoing):
+            if batch and (force or len(batch) >= BATCH_SIZE):
+                sent += 1
+                publish(False)
+                inboxes[other].put(("states", batch))
+                outgoing[other] = []
+
+    publish(True)
+    while True:
+        """ Inbox
+        Read without waiting while there is work to do; an idle worker waits for the next message
+        """
+        while True:
+            try:
+                message = inbox.get(timeout=POLL_SECONDS) if not frontier else inbox.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == "stop":
+                counters["stored"] = len(closed)
+                results.put(("counters", index, counters))
+                return
+            if message[0] == "parent":
+                entry = closed.get(message[1])
+                results.put(("parent", message[1], None if entry is None else entry[1]))
+                continue
+            received += 1
+            publish(False)
+            if not done.is_set():
+                receive(message[1])
+        if done.is_set():
+            frontier = BucketQueue("lifo")
+
+        """ Expansion
+        A few states are expanded between two reads of the inbox. Children owned by this worker are added directly; the others wait in 'outgoing' until a batch is full
+        """
+        for expansion in range(EXPANSIONS_PER_POLL):
+            if not frontier:
+                break
+            f, (g, h, state) = frontier.pop()
+            if closed[state][0] < g:
+                continue
+            if mode == "astar" and f >= best.value:
+                frontier = BucketQueue("lifo")
+                break
+            children = successors(state)
+            counters["nodes_expanded"] += 1
+            counters["nodes_generated"] += len(children)
+            counters["max_depth"] = max(counters["max_depth"], g)
+            local = []
+            for move, child in children:
+                child_owner = owner(child, workers)
+                child_h = update(h, state, child)
+                if child_owner == index:
+                    local.append((child, g + 1, child_h, state))
+                else:
+                    outgoing[child_owner].append((child, g + 1, child_h, state))
+            receive(local)
+        flush(not frontier)
+        if not frontier:
+            publish(True)
+
+""" Parallel Search
+Solves one instance with 'workers' processes (by default one per CPU) and returns the path, in the format of the other solvers. 'mode' is 'astar' or 'greedy' (see MODES).
+A SearchStats object passed as 'stats' receives the sum of the workers' counters (see stats.py)
+"""
+def parallel_search(initial_state, final_state, heuristic, size=SIZE, mode="astar", workers=None, stats=None):
+    if mode not in MODES:
+        raise ValueError(f"Unknown parallel search mode: {mode}")
+    evaluate, update = make_heuristic(heuristic, final_state, size)
+    workers = workers or os.cpu_count() or 1
+    context = multiprocessing.get_context()
+    inboxes = [context.Queue() for index in range(workers)]
+    results = context.Queue()
+    status = context.Array("q", (workers + 1) * STATUS_FIELDS)
+    best = context.Value("q", NO_SOLUTION)
+    done = context.Event()
+    processes = [context.Process(target=worker, args=(index, workers, final_state, heuristic, size, mode, inboxes, results, status, best, done), daemon=True) for index in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        """ Initial State
+        Sent by the coordinator, which counts it as a sent batch in its own slot of 'status'
+        """
+        with status.get_lock():
+            status[workers * STATUS_FIELDS] = 1
+            status[workers * STATUS_FIELDS + 2] = 1
+        inboxes[owner(initial_state, workers)].put(("states", [(initial_state, 0, evaluate(initial_state), None)]))
+
+        """ Termination
+        greedy mode stops at the first solution; astar mode (and greedy mode without a solution) when no work is left. The workers are checked on every poll (see check_workers)
+        """
+        previous = None
+        while True:
+            time.sleep(POLL_SECONDS)
+            check_workers(processes)
+            if mode == "greedy" and best.value < NO_SOLUTION:
+                break
+            current = read_status(status)
+            if previous is not None and terminated(previous, current):
+                break
+            previous = current
+        done.set()
+
+        """ Path Reconstruction
+        The parents are asked one at a time, from the final state back to the initial state, to the worker owning each state
+        """
+        path = None
+        if best.value < NO_SOLUTION:
+            path = [final_state]
+            while True:
+                inboxes[owner(path[-1], workers)].put(("parent", path[-1]))
+                message = next_result(results, processes)
+                if message[2] is None:
+                    break
+                path.append(message[2])
+            path.reverse()
+
+        """ Shutdown
+        Every worker answers "stop" with its counters
+        """
+        for inbox in inboxes:
+            inbox.put(("stop",))
+        counters = [next_result(results, processes)[2] for index in range(workers)]
+        for process in processes:
+            process.join()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+    if stats is None:
+        return path
+    stats.nodes_expanded += sum(counter["nodes_expanded"] for counter in counters)
+    stats.nodes_generated += sum(counter["nodes_generated"] for counter in counters)
+    return stats.finish(path, sum(counter["stored"] for counter in counters), max(counter["max_depth"] for counter in counters))
+
+""" Solver Entry Points
+Parallel A* and parallel greedy best-first search, with the parameters of the other informed solvers (see solver.py)
+"""
+def parallel_a_star_search(initial_state, final_state, heuristic, size=SIZE, stats=None):
+    return parallel_search(initial_state, final_state, heuristic, size, "astar", stats=stats)
+
+def parallel_greedy_search(initial_state, final_state, heuristic, size=SIZE, stats=None):
+    return parallel_search(initial_state, final_state, heuristic, size, "greedy", stats=stats)
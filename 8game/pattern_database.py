@@ -0,0 +1,191 @@
+import argparse
+import mmap
+import os
+import sys
+from collections import deque
+from board import SIZE, tile_bits, blank_position, blank_function
+
+""" Additive Pattern Databases
+A pattern is a group of goal positions; its tiles are the tiles the final state puts there. The database of a pattern stores, for every placement of its tiles, the minimum number of moves of those tiles (moves of other tiles are free) needed to bring them to their goal positions. The groups of a partition are disjoint, so no move is counted twice and the sum of their databases is an admissible heuristic, much stronger than the Manhattan distance.
+Databases only depend on the goal positions of their tiles, so they are built once per pattern by a backward BFS, stored in DATABASE_DIRECTORY, and memory-mapped when loaded: processes that use the same database share one copy in the page cache.
+A placement is indexed by the positions of the pattern's tiles, 4 bits each (tile i at bits 4i), so a database of k tiles is a byte array of 16^k entries (1 MB for 5 tiles) and a move of a tile changes the index by a simple addition
+"""
+DATABASE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "distances")
+UNREACHABLE = 255
+POSITION_BITS = 4
+_databases = {}
+
+""" Partitions
+Groups of goal positions, for goals with the empty tile in the last position (for other goals, the empty tile's position and the last one swap roles). Building a database takes seconds per 5-tile group and minutes per 6-tile group (which also needs 16^7 bytes of memory while building), for a stronger heuristic
+"""
+PARTITIONS = {
+    "3x3-4-4": (3, ((0, 1, 3, 4), (2, 5, 6, 7))),
+    "4x4-5-5-5": (4, ((0, 1, 2, 4, 5), (3, 6, 7, 10, 11), (8, 9, 12, 13, 14))),
+    "4x4-6-6-3": (4, ((0, 4, 5, 8, 9, 12), (6, 7, 10, 11, 13, 14), (1, 2, 3))),
+}
+DEFAULT_PARTITIONS = {3: "3x3-4-4", 4: "4x4-5-5-5"}
+
+""" Database Path
+File of the database of the pattern with the given goal positions
+"""
+def database_path(positions, size=SIZE, directory=DATABASE_DIRECTORY):
+    return os.path.join(directory, f"pattern_{size}x{size}_{'-'.join(map(str, positions))}.bin")
+
+""" Build Pattern Database
+Backward BFS from the goal placement over (placement of the pattern's tiles, position of the empty tile). Moving a pattern tile costs 1 and moving any other tile costs 0, so the search is a 0-1 BFS: zero-cost neighbors go to the front of the queue, states are popped in order of cost, and every placement is popped for the first time with its minimum cost over all positions of the empty tile.
+'costs' holds the lowest cost found for every (placement, empty tile) code: 16^(k+1) bytes while building a k-tile database
+The file is written under a temporary name and then renamed, so a partially written database is never loaded
+"""
+def build_pattern_database(positions, size=SIZE, directory=DATABASE_DIRECTORY):
+    count = len(positions)
+    if size * size > 1 << POSITION_BITS:
+        raise ValueError("Pattern databases only support boards of up to 4x4")
+    neighbors = []
+    for position in range(size * size):
+        row, col = divmod(position, size)
+        neighbors.append([r * size + c for r, c in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)) if 0 <= r < size and 0 <= c < size])
+    blank_shift = POSITION_BITS * count
+    placement_mask = (1 << blank_shift) - 1
+    distances = bytearray([UNREACHABLE]) * (1 << blank_shift)
+    costs = bytearray([UNREACHABLE]) * (1 << (blank_shift + POSITION_BITS))
+
+    goal = 0
+    for slot, position in enumerate(positions):
+        goal |= position << (POSITION_BITS * slot)
+    frontier = deque()
+    for blank in range(size * size):
+        if blank not in positions:
+            frontier.append((goal | blank << blank_shift, 0))
+            costs[goal | blank << blank_shift] = 0
+
+    """ 0-1 BFS Loop
+    'occupied' maps each position of a pattern tile to its slot in the placement
+    """
+    while frontier:
+        code, cost = frontier.popleft()
+        if cost > costs[code]:
+            continue
+        placement = code & placement_mask
+        if distances[placement] == UNREACHABLE:
+            distances[placement] = cost
+        blank = code >> blank_shift
+        occupied = {(placement >> (POSITION_BITS * slot)) & 15: slot for slot in range(count)}
+        for target in neighbors[blank]:
+            slot = occupied.get(target)
+            if slot is None:
+                neighbor = placement | target << blank_shift
+                if cost < costs[neighbor]:
+                    costs[neighbor] = cost
+                    frontier.appendleft((neighbor, cost))
+            else:
+                neighbor = placement + ((blank - target) << (POSITION_BITS * slot)) | target << blank_shift
+                if cost + 1 < costs[neighbor]:
+                    costs[neighbor] = cost + 1
+                    frontier.append((neighbor, cost + 1))
+
+    os.makedirs(directory, exist_ok=True)
+    path = database_path(positions, size, directory)
+    with open(path + ".tmp", "wb") as f:
+        f.write(distances)
+    os.replace(path + ".tmp", path)
+    return path
+
+""" Load Pattern Database
+Returns the memory-mapped database of a pattern, building it first if it doesn't exist yet
+"""
+def load_pattern_database(positions, size=SIZE, directory=DATABASE_DIRECTORY):
+    key = (tuple(positions), size, directory)
+    database = _databases.get(key)
+    if database is None:
+        path = database_path(positions, size, directory)
+        if not os.path.exists(path):
+            build_pattern_database(positions, size, directory)
+        with open(path, "rb") as f:
+            database = _databases[key] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return database
+
+""" Goal Groups
+The groups of a partition for a given final state: the partition's groups assume the empty tile ends in the last position, so when it ends elsewhere, that position is replaced by the last one
+"""
+def goal_groups(final_state, size=SIZE, partition=None):
+    partition = partition or DEFAULT_PARTITIONS.get(size)
+    if partition not in PARTITIONS or PARTITIONS[partition][0] != size:
+        raise ValueError(f"No pattern database partition {partition} for {size}x{size} boards")
+    blank = blank_position(final_state, size)
+    last = size * size - 1
+    return [tuple(last if position == blank else position for position in group) for group in PARTITIONS[partition][1]]
+
+""" Pattern Database Heuristic
+Builds evaluate/update (see greedy.make_heuristic) for the sum of the databases of a partition (the default one for the board size when 'partition' is None)
+"""
+PLACEMENT_CACHE_SIZE = 1 << 16
+
+def pattern_database_heuristic(final_state, size=SIZE, partition=None, directory=DATABASE_DIRECTORY):
+    bits = tile_bits(size)
+    mask = (1 << bits) - 1
+    blank = blank_function(size)
+    groups = goal_groups(final_state, size, partition)
+    databases = [load_pattern_database(group, size, directory) for group in groups]
+    """ Tile Slots
+    slots[tile] is (group, shift of the tile's position in the group's placement), or None for tiles outside every group (the empty tile)
+    """
+    tiles = [(final_state >> (position * bits)) & mask for position in range(size * size)]
+    slots = [None] * (size * size)
+    for index, group in enumerate(groups):
+        for slot, position in enumerate(group):
+            slots[tiles[position]] = (index, POSITION_BITS * slot)
+    """ Placement Cache
+    Like the walking distance (see greedy.walking_distance_heuristic), the placements of recently evaluated states are kept, so a child's placements are derived from its parent's
+    """
+    placements = {}
+
+    def place(state):
+        codes = [0] * len(groups)
+        for position in range(size * size):
+            slot = slots[(state >> (position * bits)) & mask]
+            if slot is not None:
+                codes[slot[0]] += position << slot[1]
+        return codes
+
+    def evaluate(state):
+        codes = placements[state] = place(state)
+        return sum(database[code] for database, code in zip(databases, codes))
+
+    """ Update
+    Only the group of the moved tile changes: its placement moves the tile from the child's blank position to the parent's
+    """
+    def update(value, parent, child):
+        known = placements.get(parent)
+        codes = list(known if known is not None else place(parent))
+        source = blank(child)
+        target = blank(parent)
+        index, shift = slots[(child >> (target * bits)) & mask]
+        database = databases[index]
+        value -= database[codes[index]]
+        codes[index] += (target - source) << shift
+        if len(placements) >= PLACEMENT_CACHE_SIZE:
+            placements.clear()
+        placements[child] = codes
+        return value + database[codes[index]]
+    return evaluate, update
+
+""" Command Line
+python pattern_database.py [--partition NAME] [--directory DIR]
+Builds the databases of a partition ahead of time (by default every partition of 3x3 and 4x4 boards with the empty tile in the last position)
+"""
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Build additive pattern databases")
+    parser.add_argument("--partition", choices=sorted(PARTITIONS), action="append", help="partition to build (repeatable, default: the default partitions)")
+    parser.add_argument("--directory", default=DATABASE_DIRECTORY)
+    options = parser.parse_args(arguments)
+    for name in options.partition or sorted(DEFAULT_PARTITIONS.values()):
+        size, groups = PARTITIONS[name]
+        for group in groups:
+            if os.path.exists(database_path(group, size, options.directory)):
+                print(f"{name} {group}: already built")
+                continue
+            print(f"{name} {group}: {build_pattern_database(group, size, options.directory)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import bfs
+import dfs
+import greedy
+import astar
+import oracle
+import vector_bfs
+import parallel
+import external_bfs
+import anytime
+import beam
+from board import SIZE, is_solvable
+
+""" Solver API
+Single entry point to every search algorithm, for code that wants to pick the algorithm by name (index.py and any programmatic caller).
+States are packed boards (see board.py) and the returned path is a list of packed boards, or None if there is no solution
+"""
+
+""" Algorithms
+Maps each algorithm name to its function and whether it takes a heuristic
+"""
+ALGORITHMS = {
+    'bfs': (bfs.bfs_algorithm, False),
+    'bidirectional': (bfs.bidirectional_bfs, False),
+    'external_bfs': (external_bfs.external_bfs, False),
+    'dfs': (dfs.dfs_algorithm, False),
+    'dls': (dfs.depth_limited_search, False),
+    'iddfs': (dfs.iterative_deepening_search, False),
+    'greedy': (greedy.greedy_best_first_search, True),
+    'astar': (astar.a_star_search, True),
+    'idastar': (astar.ida_star_search, True),
+    'parallel_astar': (parallel.parallel_a_star_search, True),
+    'parallel_greedy': (parallel.parallel_greedy_search, True),
+    'anytime': (anytime.anytime_a_star_search, True),
+    'beam': (beam.beam_search, True),
+    'oracle': (oracle.oracle_solve, False),
+}
+
+""" Optional Algorithms
+Algorithms that need a package which is not a dependency of the game: they are only registered when it is installed (numpy for vector_bfs, see vector_bfs.py)
+"""
+if vector_bfs.np is not None:
+    ALGORITHMS['vector_bfs'] = (vector_bfs.vector_bfs, False)
+
+""" Storage Algorithms
+Algorithms that can keep their visited states in compact storage (see compact.py)
+"""
+STORAGE_ALGORITHMS = ('bfs', 'dfs', 'greedy')
+
+""" Budget Algorithms
+Algorithms that accept a wall clock and an expanded states budget, and return the best solution found when it runs out (see anytime.py)
+"""
+BUDGET_ALGORITHMS = ('anytime',)
+
+""" Width Algorithms
+Algorithms that keep a fixed number of states per depth layer (see beam.py)
+"""
+WIDTH_ALGORITHMS = ('beam',)
+
+""" Nondeterministic Algorithms
+Algorithms whose node counts and paths depend on the scheduling of their worker processes (see parallel.py), so two runs of the same instance can differ
+"""
+NONDETERMINISTIC_ALGORITHMS = ('parallel_astar', 'parallel_greedy')
+
+""" Default Heuristic
+Used by the informed algorithms when no heuristic is given
+"""
+DEFAULT_HEURISTIC = 'manhattan'
+
+""" Solve
+Runs the chosen algorithm from initial_state to final_state. The heuristic is ignored by uninformed algorithms.
+A SearchStats object passed as 'stats' is filled in by the algorithm (see stats.py).
+'storage' ('dict' or 'compact', see compact.py) is only accepted by the algorithms in STORAGE_ALGORITHMS; by default every algorithm uses its own structures.
+'time_budget' (seconds) and 'max_nodes' (expanded states) are only accepted by the algorithms in BUDGET_ALGORITHMS; by default they run until they prove their solution optimal.
+'width' is only accepted by the algorithms in WIDTH_ALGORITHMS; by default they use their own width.
+Unsolvable pairs (see board.is_solvable) return None without searching: depth-first and iterative deepening searches would never prove it.
+Raises ValueError for unknown algorithm or heuristic names, including optional algorithms whose package is not installed
+"""
+def solve(initial_state, final_state, algorithm, heuristic=None, size=SIZE, stats=None, storage=None, time_budget=None, max_nodes=None, width=None):
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+    function, informed = ALGORITHMS[algorithm]
+    options = {"stats": stats}
+    if storage is not None:
+        if algorithm not in STORAGE_ALGORITHMS:
+            raise ValueError(f"Algorithm {algorithm} does not support the {storage} storage")
+        options["storage"] = storage
+    if time_budget is not None or max_nodes is not None:
+        if algorithm not in BUDGET_ALGORITHMS:
+            raise ValueError(f"Algorithm {algorithm} does not support budgets")
+        options["time_budget"] = time_budget
+        options["max_nodes"] = max_nodes
+    if width is not None:
+        if algorithm not in WIDTH_ALGORITHMS:
+            raise ValueError(f"Algorithm {algorithm} does not support a beam width")
+        options["width"] = width
+    if informed and (heuristic or DEFAULT_HEURISTIC) not in greedy.HEURISTICS:
+        raise ValueError(f"Unknown heuristic: {heuristic}")
+    if not is_solvable(initial_state, final_state, size):
+        return None if stats is None else stats.finish(None)
+    if informed:
+        return function(initial_state, final_state, heuristic or DEFAULT_HEURISTIC, size, **options)
+    return function(initial_state, final_state, size, **options)
+
+""" Solve Many
+One-to-many queries: the paths from initial_state to each of 'final_states', found by a single breadth-first search (see bfs.multi_goal_bfs) instead of one search per goal. Returns a dictionary mapping every goal to its shortest path, or None if it can't be reached.
+To use paths as soon as they are found, iterate over bfs.multi_goal_bfs instead
+"""
+def solve_many(initial_state, final_states, size=SIZE, stats=None, storage="dict"):
+    return dict(bfs.multi_goal_bfs(initial_state, final_states, size, stats, storage))
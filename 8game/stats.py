@@ -0,0 +1,136 @@
+import time
+
+""" Search Statistics
+Every solver takes an optional 'stats' argument. When a SearchStats object is given, the solver fills it in; when it is None (the default), the solvers skip all the bookkeeping below, so there is no cost for callers that don't ask for it.
+- nodes_expanded / nodes_generated - states taken from the frontier / children created from them
+- duplicates - generated children that were discarded because they had already been seen
+- peak_frontier - largest number of states waiting in the frontier at once
+- max_depth - number of moves from the initial state to the deepest state the search reached
+- expansion_seconds / hashing_seconds / heuristic_seconds - time spent generating children, in the explored set / 'prev' map, and evaluating the heuristic. Only measured with timing=True, since timing every call has its own cost
+- suboptimality - for anytime searches (see anytime.py), the proven bound of the solution's cost divided by the optimal cost; None for the other solvers
+Callbacks:
+- on_expand(state, stats) - called for every expanded state, e.g. for progress reporting
+- on_goal(path, stats) - called once with the solution path
+"""
+class SearchStats:
+    def __init__(self, timing=False, on_expand=None, on_goal=None):
+        self.timing = timing
+        self.on_expand = on_expand
+        self.on_goal = on_goal
+        self.nodes_expanded = 0
+        self.nodes_generated = 0
+        self.duplicates = 0
+        self.peak_frontier = 0
+        self.max_depth = 0
+        self.expansion_seconds = 0.0
+        self.hashing_seconds = 0.0
+        self.heuristic_seconds = 0.0
+        self.suboptimality = None
+
+    """ Expand
+    Records the expansion of 'state', given the frontier size and the number of children it produced
+    """
+    def expand(self, state, frontier_size, children):
+        self.nodes_expanded += 1
+        self.nodes_generated += children
+        if frontier_size > self.peak_frontier:
+            self.peak_frontier = frontier_size
+        if self.on_expand is not None:
+            self.on_expand(state, self)
+
+    """ Finish
+    Called by the solvers when the search ends. 'stored' is the number of distinct states the search kept (so every other generated child was a duplicate) and 'max_depth', when known, the depth of the deepest state
+    """
+    def finish(self, path, stored=None, max_depth=None):
+        if stored is not None:
+            self.duplicates = self.nodes_generated - (stored - 1)
+        if max_depth is not None:
+            self.max_depth = max_depth
+        if path is not None and self.on_goal is not None:
+            self.on_goal(path, self)
+        return path
+
+    """ Timed
+    Wraps 'function' so that the time spent in it is added to the given attribute (e.g. "expansion_seconds"). Without timing the function is returned unchanged
+    """
+    def timed(self, function, attribute):
+        if not self.timing:
+            return function
+
+        def timed_function(*arguments):
+            start = time.perf_counter()
+            result = function(*arguments)
+            setattr(self, attribute, getattr(self, attribute) + time.perf_counter() - start)
+            return result
+        return timed_function
+
+    """ Timed Set / Timed Dict
+    With timing, the explored set and 'prev' map are replaced by these subclasses, which add the time of every lookup and insertion to hashing_seconds
+    """
+    def timed_set(self, items):
+        return TimedSet(self, items) if self.timing else items
+
+    def timed_dict(self, items):
+        return TimedDict(self, items) if self.timing else items
+
+    def as_dict(self):
+        return {key: value for key, value in vars(self).items() if key not in ("timing", "on_expand", "on_goal")}
+
+class TimedSet(set):
+    def __init__(self, stats, items):
+        super().__init__(items)
+        self.stats = stats
+
+    def __contains__(self, item):
+        start = time.perf_counter()
+        result = super().__contains__(item)
+        self.stats.hashing_seconds += time.perf_counter() - start
+        return result
+
+    def add(self, item):
+        start = time.perf_counter()
+        super().add(item)
+        self.stats.hashing_seconds += time.perf_counter() - start
+
+class TimedDict(dict):
+    def __init__(self, stats, items):
+        super().__init__(items)
+        self.stats = stats
+
+    def __contains__(self, key):
+        start = time.perf_counter()
+        result = super().__contains__(key)
+        self.stats.hashing_seconds += time.perf_counter() - start
+        return result
+
+    def __setitem__(self, key, value):
+        start = time.perf_counter()
+        super().__setitem__(key, value)
+        self.stats.hashing_seconds += time.perf_counter() - start
+
+    def get(self, key, default=None):
+        start = time.perf_counter()
+        result = super().get(key, default)
+        self.stats.hashing_seconds += time.perf_counter() - start
+        return result
+
+""" Tree Depth
+Returns the depth of the deepest state of a 'prev' map (state -> parent). Each state's depth is computed once, so this is linear in the number of states; solvers only call it when statistics are requested
+Compact stores (see compact.py) compute it themselves
+"""
+def tree_depth(prev):
+    if not isinstance(prev, dict):
+        return prev.tree_depth()
+    depths = {}
+    deepest = 0
+    for state in prev:
+        chain = []
+        while state is not None and state not in depths:
+            chain.append(state)
+            state = dict.get(prev, state)
+        depth = -1 if state is None else depths[state]
+        for state in reversed(chain):
+            depth += 1
+            depths[state] = depth
+        deepest = max(deepest, depth)
+    return deepest
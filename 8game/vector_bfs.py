@@ -0,0 +1,131 @@
+""" NumPy
+Optional dependency: vector_bfs only works when numpy is installed ("pip install numpy")
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+from board import SIZE, tile_bits, packed_bits, caches_blank, move_table, NO_MOVE
+
+""" Vectorized BFS
+Level-synchronous alternative to bfs.bfs_algorithm. Each depth layer is a sorted NumPy array of packed states (uint64), and all children of a layer are generated at once with array operations driven by the move table (see board.move_table), instead of expanding one board at a time in the interpreter.
+Moves are reversible and every move changes the color of the empty tile's square on a checkerboard, so the children of layer d can only be in layers d - 1 or d + 1: duplicates are removed with np.unique and by binary search (np.searchsorted) against the previous layer, and no global visited set is needed.
+Parent links are kept as one int32 array per layer with, for every state, the index of its parent in the previous layer
+"""
+
+""" Layer Children
+Returns (children, parents): every child of every state of 'layer' and, for each child, the index of its parent in 'layer'
+"""
+def layer_children(layer, size, directions):
+    bits = tile_bits(size)
+    blank_shift = np.uint64(size * size * bits)
+    mask = np.uint64((1 << bits) - 1)
+    cached = caches_blank(size)
+    blanks = layer_blanks(layer, size)
+    children, parents = [], []
+    """ Direction Gathers
+    For each direction, the rows of the table give, per blank position, the position the empty tile moves to (-1 when the move is illegal). The moved tile is taken out of its position and put where the empty tile was
+    """
+    for targets in directions:
+        target = targets[blanks]
+        legal = np.nonzero(target >= 0)[0]
+        if legal.size == 0:
+            continue
+        states = layer[legal]
+        target = target[legal].astype(np.uint64)
+        blank = blanks[legal].astype(np.uint64)
+        tile_shift = target * np.uint64(bits)
+        tile = (states >> tile_shift) & mask
+        child = states - (tile << tile_shift) + (tile << (blank * np.uint64(bits)))
+        if cached:
+            child = child - (blank << blank_shift) + (target << blank_shift)
+        children.append(child)
+        parents.append(legal)
+    return np.concatenate(children), np.concatenate(parents).astype(np.int32)
+
+""" Layer Blanks
+Positions of the empty tile of every state of 'layer': the cached index, or, on boards that don't cache it (4x4, see board.caches_blank), the position whose tile field is zero
+"""
+def layer_blanks(layer, size):
+    bits = tile_bits(size)
+    if caches_blank(size):
+        return (layer >> np.uint64(size * size * bits)).astype(np.intp)
+    mask = np.uint64((1 << bits) - 1)
+    blanks = np.zeros(layer.shape, dtype=np.intp)
+    for position in range(size * size):
+        blanks[((layer >> np.uint64(position * bits)) & mask) == 0] = position
+    return blanks
+
+""" Membership
+Boolean array telling which 'values' are present in the sorted array 'layer'
+"""
+def contains(layer, values):
+    if layer.size == 0:
+        return np.zeros(values.shape, dtype=bool)
+    index = np.minimum(np.searchsorted(layer, values), layer.size - 1)
+    return layer[index] == values
+
+""" Vectorized BFS Algorithm
+Same parameters and path format as bfs_algorithm. Only boards whose packed form fits in 64 bits (3x3 and 4x4) are supported
+With 'stats', counters are updated once per layer, and on_expand is called with each layer array instead of each state
+"""
+def vector_bfs(initial_state, final_state, size=SIZE, stats=None):
+    if np is None:
+        raise RuntimeError("vector_bfs requires numpy (pip install numpy)")
+    if packed_bits(size) > 64:
+        raise ValueError("vector_bfs only supports boards that pack into 64 bits (3x3 and 4x4)")
+
+    """ Direction Tables
+    directions[move][blank] is the position the empty tile moves to, or -1
+    """
+    directions = np.full((4, size * size), -1, dtype=np.intp)
+    bits = tile_bits(size)
+    for blank, entries in enumerate(move_table(size)):
+        for move, shift, factor, offset in entries[NO_MOVE]:
+            directions[move][blank] = shift // bits
+
+    layers = [np.array([initial_state], dtype=np.uint64)]
+    parent_links = [np.array([-1], dtype=np.int32)]
+    goal = np.array([final_state], dtype=np.uint64)
+
+    """ BFS Loop
+    Each iteration builds the next layer from the whole current layer
+    """
+    while True:
+        if contains(layers[-1], goal)[0]:
+            path = reconstruct_layer_path(layers, parent_links, final_state)
+            return path if stats is None else stats.finish(path, max_depth=len(layers) - 1)
+        children, parents = layer_children(layers[-1], size, directions)
+        generated = children.size
+        if stats is not None:
+            stats.nodes_expanded += layers[-1].size
+            stats.nodes_generated += generated
+            stats.peak_frontier = max(stats.peak_frontier, int(layers[-1].size))
+            if stats.on_expand is not None:
+                stats.on_expand(layers[-1], stats)
+        """ Deduplication
+        np.unique sorts the children and keeps the first occurrence of each; states already in the previous layer are then dropped
+        """
+        children, first = np.unique(children, return_index=True)
+        parents = parents[first]
+        if len(layers) > 1:
+            new = ~contains(layers[-2], children)
+        else:
+            new = np.ones(children.shape, dtype=bool)
+        if stats is not None:
+            stats.duplicates += generated - int(new.sum())
+        if not new.any():
+            return None if stats is None else stats.finish(None, max_depth=len(layers) - 1)
+        layers.append(children[new])
+        parent_links.append(parents[new])
+
+""" Reconstruct Layer Path
+Follows the parent indices from the final state in the last layer back to the initial state
+"""
+def reconstruct_layer_path(layers, parent_links, final_state):
+    index = int(np.searchsorted(layers[-1], np.uint64(final_state)))
+    path = []
+    for depth in range(len(layers) - 1, -1, -1):
+        path.append(int(layers[depth][index]))
+        index = int(parent_links[depth][index])
+    return path[::-1]